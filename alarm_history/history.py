@@ -0,0 +1,249 @@
+import boto3
+import datetime
+import json
+import logging
+import os
+import sqlite3
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# DescribeAlarmHistory has a low request rate; adaptive retries back off instead of failing
+cloudwatch = boto3.client('cloudwatch', config=Config(max_pool_connections=32, retries={'mode': 'adaptive', 'max_attempts': 10}))
+
+ALARM_INDEX_PATH = os.path.join(os.path.expanduser('~'), '.aws-boto3-alarm-index.db')
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_WINDOW_DAYS = 14
+FLAP_MINUTES = 15  # an ALARM episode shorter than this counts as a flap
+
+# Alarm name prefixes created by the ec2, emr and s3 tools
+MANAGED_ALARM_PREFIXES = [
+    'HighCPUUtilization-',
+    'InstanceStatusCheckFailed-',
+    'FleetMaxCPU-',
+    'EMR-',
+    'EMRHealth-',
+    'S3BucketSizeAlarm-',
+    'S3NumberOfObjectsAlarm-',
+]
+
+
+def open_alarm_index(index_path=ALARM_INDEX_PATH):
+    conn = sqlite3.connect(index_path, check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS transitions ("
+        "alarm_name TEXT, timestamp TEXT, old_state TEXT, new_state TEXT, "
+        "PRIMARY KEY (alarm_name, timestamp, new_state))"
+    )
+    return conn
+
+
+def list_managed_alarms():
+    """Returns every metric and composite alarm whose name starts with a managed prefix."""
+    alarms = []
+    paginator = cloudwatch.get_paginator('describe_alarms')
+    for prefix in MANAGED_ALARM_PREFIXES:
+        for page in paginator.paginate(AlarmNamePrefix=prefix, AlarmTypes=['MetricAlarm', 'CompositeAlarm']):
+            alarms.extend(page.get('MetricAlarms', []))
+            alarms.extend(page.get('CompositeAlarms', []))
+    # De-duplicate in case prefixes ever overlap
+    return list({alarm['AlarmName']: alarm for alarm in alarms}.values())
+
+
+def fetch_alarm_transitions(alarm_name, since):
+    """Pages through the state changes of one alarm since the given time."""
+    transitions = []
+    paginator = cloudwatch.get_paginator('describe_alarm_history')
+    for page in paginator.paginate(AlarmName=alarm_name, HistoryItemType='StateUpdate',
+                                   StartDate=since, EndDate=datetime.datetime.now(datetime.timezone.utc)):
+        for item in page['AlarmHistoryItems']:
+            try:
+                data = json.loads(item['HistoryData'])
+                old_state = data['oldState']['stateValue']
+                new_state = data['newState']['stateValue']
+            except (ValueError, KeyError):
+                continue
+            # Stored as UTC so timestamps compare correctly as strings in the index
+            timestamp = item['Timestamp'].astimezone(datetime.timezone.utc).isoformat()
+            transitions.append((alarm_name, timestamp, old_state, new_state))
+    return transitions
+
+
+def sync_alarm_history(alarm_names, window_days=DEFAULT_WINDOW_DAYS, max_workers=DEFAULT_MAX_WORKERS,
+                       index_path=ALARM_INDEX_PATH):
+    """
+    Fetches new state transitions for every alarm in parallel and stores them
+    in the local index. Each alarm is fetched only from its last stored
+    transition onward, so repeated runs are incremental.
+    """
+    conn = open_alarm_index(index_path)
+    window_start = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=window_days)
+    latest = dict(conn.execute("SELECT alarm_name, MAX(timestamp) FROM transitions GROUP BY alarm_name"))
+
+    def since(alarm_name):
+        if alarm_name in latest:
+            return max(window_start, datetime.datetime.fromisoformat(latest[alarm_name]))
+        return window_start
+
+    def fetch(alarm_name):
+        try:
+            return fetch_alarm_transitions(alarm_name, since(alarm_name))
+        except Exception as e:
+            logger.error(f"Error fetching history for alarm '{alarm_name}': {e}")
+            return []
+
+    stored = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for transitions in executor.map(fetch, alarm_names):
+                conn.executemany("INSERT OR IGNORE INTO transitions VALUES (?, ?, ?, ?)", transitions)
+                stored += len(transitions)
+        conn.commit()
+    finally:
+        conn.close()
+    logger.info(f"Fetched {stored} alarm state transitions for {len(alarm_names)} alarms.")
+    return stored
+
+
+def load_transitions(alarm_name, since, index_path=ALARM_INDEX_PATH):
+    conn = open_alarm_index(index_path)
+    try:
+        rows = conn.execute(
+            "SELECT timestamp, old_state, new_state FROM transitions "
+            "WHERE alarm_name = ? AND timestamp >= ? ORDER BY timestamp",
+            (alarm_name, since.astimezone(datetime.timezone.utc).isoformat())
+        ).fetchall()
+    finally:
+        conn.close()
+    return [(datetime.datetime.fromisoformat(ts), old, new) for ts, old, new in rows]
+
+
+def compute_alarm_stats(transitions, window_start, window_end, current_state=None):
+    """
+    Computes alarm count, flaps, time in ALARM and mean time to recover from
+    an ordered list of (timestamp, old state, new state) within the window.
+    """
+    episodes = []
+    alarm_since = None
+    if transitions and transitions[0][1] == 'ALARM':
+        alarm_since = window_start
+    elif not transitions and current_state == 'ALARM':
+        alarm_since = window_start
+
+    for timestamp, _, new_state in transitions:
+        if new_state == 'ALARM' and alarm_since is None:
+            alarm_since = timestamp
+        elif new_state != 'ALARM' and alarm_since is not None:
+            episodes.append((alarm_since, timestamp))
+            alarm_since = None
+    open_episode = (alarm_since, window_end) if alarm_since is not None else None
+
+    durations = [(end - start).total_seconds() for start, end in episodes]
+    in_alarm = sum(durations) + ((open_episode[1] - open_episode[0]).total_seconds() if open_episode else 0)
+    window_seconds = (window_end - window_start).total_seconds()
+    days = window_seconds / 86400
+
+    return {
+        'Transitions': len(transitions),
+        'AlarmEpisodes': len(episodes) + (1 if open_episode else 0),
+        'Flaps': sum(1 for d in durations if d < FLAP_MINUTES * 60),
+        'FlapsPerDay': round(sum(1 for d in durations if d < FLAP_MINUTES * 60) / days, 2) if days else 0,
+        'TimeInAlarmPct': round(100 * in_alarm / window_seconds, 2) if window_seconds else 0,
+        'MTTRMinutes': round(sum(durations) / len(durations) / 60, 1) if durations else None,
+    }
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def recommend_threshold(alarm, window_days=DEFAULT_WINDOW_DAYS):
+    """
+    Recommends a threshold for a single-metric alarm from the metric's history
+    at the alarm's own period and statistic: just above p99 for GreaterThan
+    alarms, just below p1 for LessThan alarms. Percentage thresholds are capped at 100.
+    """
+    if 'MetricName' not in alarm or 'Statistic' not in alarm:
+        return None  # composite, metric-math or extended-statistic alarms
+
+    end_time = datetime.datetime.now(datetime.timezone.utc)
+    values = []
+    paginator = cloudwatch.get_paginator('get_metric_data')
+    for page in paginator.paginate(
+        MetricDataQueries=[{
+            'Id': 'm',
+            'MetricStat': {
+                'Metric': {
+                    'Namespace': alarm['Namespace'],
+                    'MetricName': alarm['MetricName'],
+                    'Dimensions': alarm.get('Dimensions', []),
+                },
+                'Period': alarm['Period'],
+                'Stat': alarm['Statistic'],
+            },
+        }],
+        StartTime=end_time - datetime.timedelta(days=window_days),
+        EndTime=end_time,
+    ):
+        for result in page['MetricDataResults']:
+            values.extend(result['Values'])
+
+    if not values:
+        return None
+    values.sort()
+    threshold = alarm['Threshold']
+    greater = alarm['ComparisonOperator'].startswith('GreaterThan')
+    breaching = sum(1 for v in values if (v > threshold if greater else v < threshold))
+    percentile, q, margin = ('p99', 0.99, 1.1) if greater else ('p1', 0.01, 0.9)
+    basis = _percentile(values, q)
+    recommended = basis * margin
+    if alarm.get('Unit') == 'Percent' or alarm['MetricName'].endswith('Utilization'):
+        recommended = min(recommended, 100.0)
+    return {
+        'Datapoints': len(values),
+        'P50': _percentile(values, 0.5),
+        'Percentile': percentile,
+        'PercentileValue': basis,
+        'BreachingPct': round(100 * breaching / len(values), 2),
+        'RecommendedThreshold': round(recommended, 2),
+    }
+
+
+def analyze_alarms(window_days=DEFAULT_WINDOW_DAYS, max_workers=DEFAULT_MAX_WORKERS, index_path=ALARM_INDEX_PATH,
+                   recommend=True):
+    """
+    Syncs the alarm history index and returns one row per managed alarm with
+    flap rate, time in alarm, MTTR and, for single-metric alarms, a
+    percentile-based threshold recommendation.
+    """
+    alarms = list_managed_alarms()
+    sync_alarm_history([a['AlarmName'] for a in alarms], window_days, max_workers, index_path)
+
+    window_end = datetime.datetime.now(datetime.timezone.utc)
+    window_start = window_end - datetime.timedelta(days=window_days)
+
+    def analyze(alarm):
+        row = {
+            'AlarmName': alarm['AlarmName'],
+            'State': alarm.get('StateValue'),
+            'Threshold': alarm.get('Threshold'),
+            'Period': alarm.get('Period'),
+            'EvaluationPeriods': alarm.get('EvaluationPeriods'),
+        }
+        transitions = load_transitions(alarm['AlarmName'], window_start, index_path)
+        row.update(compute_alarm_stats(transitions, window_start, window_end, alarm.get('StateValue')))
+        if recommend:
+            try:
+                row.update(recommend_threshold(alarm, window_days) or {})
+            except Exception as e:
+                logger.error(f"Error computing a threshold recommendation for '{alarm['AlarmName']}': {e}")
+        return row
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        rows = list(executor.map(analyze, alarms))
+    rows.sort(key=lambda r: (r['Flaps'], r['TimeInAlarmPct']), reverse=True)
+    return rows
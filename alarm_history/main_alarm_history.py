@@ -0,0 +1,64 @@
+# boto3/alarm_history/main_alarm_history.py
+#
+# Pulls the state history of every alarm the ec2/emr/s3 tools manage into a
+# local index and reports flapping, time in alarm, MTTR and suggested thresholds.
+#
+#   python alarm_history/main_alarm_history.py --days 14
+
+import sys
+import os
+import argparse
+import logging
+
+import pandas as pd
+
+# Ensure the parent directory is in sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from alarm_history.history import analyze_alarms, ALARM_INDEX_PATH, DEFAULT_WINDOW_DAYS, DEFAULT_MAX_WORKERS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def print_alarm_report(rows, limit=20):
+    print("\n--- Alarm History Report ---")
+    for row in rows[:limit]:
+        mttr = f"{row['MTTRMinutes']} min" if row['MTTRMinutes'] is not None else 'N/A'
+        line = (f"{row['AlarmName']}: {row['AlarmEpisodes']} alarms, {row['Flaps']} flaps "
+                f"({row['FlapsPerDay']}/day), {row['TimeInAlarmPct']}% in alarm, MTTR {mttr}")
+        if row.get('RecommendedThreshold') is not None:
+            line += (f", threshold {row['Threshold']} breached {row['BreachingPct']}% of periods, "
+                     f"{row['Percentile']} {row['PercentileValue']:.2f} -> suggest {row['RecommendedThreshold']}")
+        print(line)
+    print(f"Total: {len(rows)} alarms\n")
+
+
+def save_alarm_report_to_csv(rows, file_name='Alarm_History_Report.csv'):
+    if not rows:
+        logger.error("No alarms to write to the report.")
+        return
+    try:
+        file_path = os.path.join(os.getcwd(), file_name)
+        pd.DataFrame(rows).to_csv(file_path, index=False)
+        logger.info(f"Alarm history report saved at: {file_path}")
+    except Exception as e:
+        logger.error(f"Failed to save the report to CSV: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alarm state history and flapping analytics.")
+    parser.add_argument('--days', type=int, default=DEFAULT_WINDOW_DAYS)
+    parser.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument('--index', default=ALARM_INDEX_PATH, help="Local alarm history index (SQLite)")
+    parser.add_argument('--no-recommendations', action='store_true', help="Skip fetching metric history")
+    args = parser.parse_args()
+
+    rows = analyze_alarms(args.days, args.max_workers, args.index, recommend=not args.no_recommendations)
+    print_alarm_report(rows)
+    save_alarm_report_to_csv(rows)
+
+
+if __name__ == "__main__":
+    main()
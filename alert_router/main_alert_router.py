@@ -0,0 +1,70 @@
+# boto3/alert_router/main_alert_router.py
+#
+# Routes CloudWatch alarm notifications from the ec2/emr/s3 SNS topics through
+# an SQS queue, grouping bursts into single notifications.
+#
+#   python alert_router/main_alert_router.py --workers 4 --window 60
+#   python alert_router/main_alert_router.py --sns-topic <summary topic ARN> --webhook https://hooks.example.com/...
+
+import sys
+import os
+import argparse
+import logging
+
+import boto3
+
+# Ensure the parent directory is in sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from alert_router.router import AlertRouter, setup_alert_queue, DEFAULT_GROUP_WINDOW
+from alert_router.sinks import LogSink, SnsSink, WebhookSink
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Topics created by the ec2, emr and s3 menus
+MANAGED_TOPIC_NAMES = {'HighCPUUtilizationAlerts', 'InstanceStatusCheckAlerts', 'S3Alert'}
+
+
+def find_managed_topics(sns):
+    """Returns the ARNs of the alert topics this tool creates, including the per-metric EMR topics."""
+    topic_arns = []
+    for page in sns.get_paginator('list_topics').paginate():
+        for topic in page['Topics']:
+            name = topic['TopicArn'].rsplit(':', 1)[-1]
+            if name in MANAGED_TOPIC_NAMES or (name.startswith('EMR-') and name.endswith('-Alerts')):
+                topic_arns.append(topic['TopicArn'])
+    return topic_arns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Group and route CloudWatch alarm notifications via SQS.")
+    parser.add_argument('--queue-name', default='aws-boto3-alert-router')
+    parser.add_argument('--topics', default='', help="Comma-separated topic ARNs (default: all managed topics)")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--window', type=int, default=DEFAULT_GROUP_WINDOW, help="Grouping window in seconds")
+    parser.add_argument('--sns-topic', default=None, help="Topic ARN to publish grouped notifications to")
+    parser.add_argument('--webhook', default=None, help="URL to POST grouped notifications to")
+    args = parser.parse_args()
+
+    sns = boto3.client('sns')
+    topic_arns = [t.strip() for t in args.topics.split(',') if t.strip()] or find_managed_topics(sns)
+    if not topic_arns:
+        logger.error("No alert topics found. Set up an alarm from the ec2, emr or s3 menus first.")
+        sys.exit(1)
+
+    # Visibility must outlast the grouping window, or messages reappear before their group is sent
+    queue_url = setup_alert_queue(args.queue_name, topic_arns, visibility_timeout=max(300, args.window * 3), sns=sns)
+
+    sinks = [LogSink()]
+    if args.sns_topic:
+        sinks.append(SnsSink(args.sns_topic, sns))
+    if args.webhook:
+        sinks.append(WebhookSink(args.webhook))
+
+    AlertRouter(queue_url, sinks, workers=args.workers, group_window=args.window).run()
+
+
+if __name__ == "__main__":
+    main()
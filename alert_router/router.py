@@ -0,0 +1,235 @@
+import boto3
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+RECEIVE_BATCH_SIZE = 10  # SQS maximum per ReceiveMessage
+LONG_POLL_SECONDS = 20  # SQS maximum wait
+DEFAULT_GROUP_WINDOW = 60
+SEEN_CACHE_SIZE = 100000
+DELIVERED = 'delivered'  # seen-cache marker for alarms whose group reached every sink
+
+
+def setup_alert_queue(queue_name, topic_arns, visibility_timeout=300, sqs=None, sns=None):
+    """
+    Creates (or reuses) an SQS queue, allows the given SNS topics to deliver to
+    it and subscribes it to each of them. Returns the queue URL.
+    """
+    sqs = sqs or boto3.client('sqs')
+    sns = sns or boto3.client('sns')
+
+    queue_url = sqs.create_queue(
+        QueueName=queue_name,
+        Attributes={'VisibilityTimeout': str(visibility_timeout), 'ReceiveMessageWaitTimeSeconds': str(LONG_POLL_SECONDS)},
+    )['QueueUrl']
+    queue_arn = sqs.get_queue_attributes(QueueUrl=queue_url, AttributeNames=['QueueArn'])['Attributes']['QueueArn']
+
+    policy = {
+        'Version': '2012-10-17',
+        'Statement': [{
+            'Effect': 'Allow',
+            'Principal': {'Service': 'sns.amazonaws.com'},
+            'Action': 'sqs:SendMessage',
+            'Resource': queue_arn,
+            'Condition': {'ArnEquals': {'aws:SourceArn': list(topic_arns)}},
+        }],
+    }
+    sqs.set_queue_attributes(QueueUrl=queue_url, Attributes={'Policy': json.dumps(policy)})
+
+    for topic_arn in topic_arns:
+        sns.subscribe(TopicArn=topic_arn, Protocol='sqs', Endpoint=queue_arn)
+        logger.info(f"Queue '{queue_name}' subscribed to SNS topic '{topic_arn}'.")
+    return queue_url
+
+
+def parse_alarm_message(body):
+    """
+    Extracts the CloudWatch alarm from an SNS-to-SQS message body. Returns None
+    for messages that are not alarm notifications.
+    """
+    try:
+        envelope = json.loads(body)
+        alarm = json.loads(envelope['Message'])
+        trigger = alarm.get('Trigger', {})
+        dimensions = trigger.get('Dimensions', [])
+        return {
+            'MessageId': envelope.get('MessageId'),
+            'AlarmName': alarm['AlarmName'],
+            'State': alarm['NewStateValue'],
+            'StateChangeTime': alarm.get('StateChangeTime'),
+            'Reason': alarm.get('NewStateReason', ''),
+            'Region': alarm.get('Region', ''),
+            'Namespace': trigger.get('Namespace', ''),
+            'MetricName': trigger.get('MetricName', ''),
+            'Resource': ','.join(d.get('value', '') for d in dimensions) or alarm['AlarmName'],
+        }
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class AlertRouter:
+    """
+    Consumes alarm notifications from an SQS queue on several long-polling
+    workers, drops duplicates, groups alarms for the same metric and state that
+    arrive within group_window seconds into one notification and dispatches it
+    to every sink. Messages are deleted only after their group was dispatched,
+    so a crash redelivers rather than loses alarms. A duplicate of an alarm
+    still waiting in a group is held with that group and deleted with it.
+    """
+
+    def __init__(self, queue_url, sinks, workers=4, group_window=DEFAULT_GROUP_WINDOW,
+                 wait_seconds=LONG_POLL_SECONDS, sqs=None):
+        self.queue_url = queue_url
+        self.wait_seconds = wait_seconds
+        self.sinks = list(sinks)
+        self.workers = workers
+        self.group_window = group_window
+        self.sqs = sqs or boto3.client('sqs')
+        self.groups = {}
+        self.seen = OrderedDict()
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.stats = {'received': 0, 'duplicates': 0, 'ignored': 0, 'notifications': 0}
+
+    @staticmethod
+    def _dedup_keys(alarm):
+        return [('message', alarm['MessageId']), ('transition', alarm['AlarmName'], alarm['State'], alarm['StateChangeTime'])]
+
+    def _original(self, alarm):
+        """The open group holding an earlier copy of the alarm, DELIVERED once it was dispatched, or None."""
+        for key in self._dedup_keys(alarm):
+            if key in self.seen:
+                return self.seen[key]
+        return None
+
+    def _remember(self, alarm, owner):
+        for key in self._dedup_keys(alarm):
+            self.seen[key] = owner
+            self.seen.move_to_end(key)
+            if owner is not DELIVERED:
+                owner['keys'].append(key)
+        while len(self.seen) > SEEN_CACHE_SIZE:
+            self.seen.popitem(last=False)
+
+    def handle_messages(self, messages):
+        """Adds a received batch to the open groups. Returns receipt handles that can be deleted now."""
+        deletable = []
+        now = time.time()
+        with self.lock:
+            for message in messages:
+                self.stats['received'] += 1
+                alarm = parse_alarm_message(message['Body'])
+                if alarm is None:
+                    self.stats['ignored'] += 1
+                    deletable.append(message['ReceiptHandle'])
+                    continue
+                original = self._original(alarm)
+                if original is not None:
+                    self.stats['duplicates'] += 1
+                    if original is DELIVERED:
+                        deletable.append(message['ReceiptHandle'])
+                    else:
+                        # If the original's group fails a sink, this copy must come back too
+                        original['receipts'].append(message['ReceiptHandle'])
+                    self._remember(alarm, original)
+                    continue
+
+                key = (alarm['Region'], alarm['Namespace'], alarm['MetricName'], alarm['State'])
+                group = self.groups.setdefault(key, {'opened': now, 'alarms': [], 'receipts': [], 'keys': []})
+                group['alarms'].append(alarm)
+                group['receipts'].append(message['ReceiptHandle'])
+                self._remember(alarm, group)
+        return deletable
+
+    def _delete(self, receipt_handles):
+        for offset in range(0, len(receipt_handles), RECEIVE_BATCH_SIZE):
+            entries = [
+                {'Id': str(i), 'ReceiptHandle': handle}
+                for i, handle in enumerate(receipt_handles[offset:offset + RECEIVE_BATCH_SIZE])
+            ]
+            response = self.sqs.delete_message_batch(QueueUrl=self.queue_url, Entries=entries)
+            for failure in response.get('Failed', []):
+                logger.warning(f"Failed to delete message from the alert queue: {failure.get('Message')}")
+
+    def flush(self, force=False):
+        """Dispatches every group whose window has closed (or all of them when forced)."""
+        now = time.time()
+        with self.lock:
+            ready = [key for key, group in self.groups.items() if force or now - group['opened'] >= self.group_window]
+            groups = [(key, self.groups.pop(key)) for key in ready]
+
+        for (region, namespace, metric_name, state), group in groups:
+            alarms = group['alarms']
+            notification = {
+                'Region': region,
+                'Namespace': namespace,
+                'MetricName': metric_name,
+                'State': state,
+                'Count': len(alarms),
+                'Alarms': [a['AlarmName'] for a in alarms],
+                'Resources': sorted({a['Resource'] for a in alarms}),
+                'FirstSeen': min(a['StateChangeTime'] or '' for a in alarms),
+                'LastSeen': max(a['StateChangeTime'] or '' for a in alarms),
+                'Reason': alarms[0]['Reason'],
+            }
+            delivered = True
+            for sink in self.sinks:
+                try:
+                    sink(notification)
+                except Exception as e:
+                    delivered = False
+                    logger.error(f"Error dispatching alert notification to {type(sink).__name__}: {e}")
+            self.stats['notifications'] += 1
+            # Leave the messages on the queue if a sink failed; they come back after the visibility timeout
+            with self.lock:
+                for key in group['keys']:
+                    if self.seen.get(key) is group:
+                        if delivered:
+                            self.seen[key] = DELIVERED
+                        else:
+                            del self.seen[key]
+                receipts = list(group['receipts'])
+            if delivered:
+                self._delete(receipts)
+
+    def _worker(self):
+        while not self.stopping.is_set():
+            try:
+                response = self.sqs.receive_message(
+                    QueueUrl=self.queue_url,
+                    MaxNumberOfMessages=RECEIVE_BATCH_SIZE,
+                    WaitTimeSeconds=self.wait_seconds,
+                )
+                messages = response.get('Messages', [])
+                if messages:
+                    deletable = self.handle_messages(messages)
+                    if deletable:
+                        self._delete(deletable)
+            except Exception as e:
+                logger.error(f"Error receiving from the alert queue: {e}")
+                self.stopping.wait(5)
+
+    def run(self, duration=None):
+        """Runs the workers until interrupted (or for duration seconds), then flushes open groups."""
+        threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        logger.info(f"Alert router consuming '{self.queue_url}' with {self.workers} workers.")
+
+        deadline = time.time() + duration if duration else None
+        try:
+            while not deadline or time.time() < deadline:
+                self.flush()
+                time.sleep(1)
+        except KeyboardInterrupt:
+            logger.info("Stopping alert router...")
+        finally:
+            self.stopping.set()
+            for thread in threads:
+                thread.join()
+            self.flush(force=True)
+            logger.info(f"Alert router stats: {self.stats}")
@@ -0,0 +1,52 @@
+import boto3
+import json
+import logging
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+
+def format_notification(notification):
+    """One human-readable message for a group of alarms."""
+    resources = notification['Resources']
+    shown = ', '.join(resources[:20]) + (f" and {len(resources) - 20} more" if len(resources) > 20 else '')
+    return (
+        f"{notification['Count']} {notification['Namespace']} {notification['MetricName']} alarm(s) "
+        f"went to {notification['State']} in {notification['Region']} "
+        f"between {notification['FirstSeen']} and {notification['LastSeen']}.\n"
+        f"Resources: {shown}\n"
+        f"Example reason: {notification['Reason']}"
+    )
+
+
+class LogSink:
+    """Writes each grouped notification to the log."""
+
+    def __call__(self, notification):
+        logger.warning(format_notification(notification))
+
+
+class SnsSink:
+    """Publishes one message per group to an SNS topic, e.g. the existing email topics."""
+
+    def __init__(self, topic_arn, sns=None):
+        self.topic_arn = topic_arn
+        self.sns = sns or boto3.client('sns')
+
+    def __call__(self, notification):
+        subject = f"{notification['Count']} x {notification['MetricName']} {notification['State']}"
+        self.sns.publish(TopicArn=self.topic_arn, Subject=subject[:100], Message=format_notification(notification))
+
+
+class WebhookSink:
+    """POSTs each grouped notification as JSON, e.g. to a Slack or PagerDuty webhook."""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, notification):
+        body = json.dumps(dict(notification, Text=format_notification(notification))).encode()
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
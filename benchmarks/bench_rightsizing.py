@@ -0,0 +1,100 @@
+# boto3/benchmarks/bench_rightsizing.py
+#
+# Analysis time of emr/rightsizing.py on a synthetic fleet: profiles and
+# instance-type matching for N instances x D days of 5-minute CPU datapoints.
+# Collection is not measured; it is bound by the GetMetricData API.
+#
+#   python benchmarks/bench_rightsizing.py --instances 10000 --days 30
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run_benchmarks import RESULTS_DIR, default_label
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def synthetic_fleet(instances, days, instance_types, seed=0):
+    """Gamma-distributed CPU with a per-instance load factor and 1% missing datapoints."""
+    rng = np.random.default_rng(seed)
+    slots = days * 86400 // 300
+    matrix = (rng.gamma(2.0, 8.0, size=(instances, slots)) * rng.uniform(0.3, 3.0, size=(instances, 1))).astype(np.float32)
+    np.clip(matrix, 0, 100, out=matrix)
+    matrix[rng.random(matrix.shape) < 0.01] = np.nan
+    fleet = pd.DataFrame({
+        'InstanceId': [f"i-{n:017x}" for n in range(instances)],
+        'InstanceType': rng.choice(instance_types, instances),
+        'ClusterId': None,
+        'NodeType': 'EC2',
+    })
+    return fleet, matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis-time benchmark for emr/rightsizing.py.")
+    parser.add_argument('--instances', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--label', default=None, help="Name for this run (defaults to git describe)")
+    parser.add_argument('--results-dir', default=os.path.join(RESULTS_DIR, 'rightsizing'))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    label = args.label or default_label()
+
+    # rightsizing creates its clients at import time; no request is ever sent
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    from emr import rightsizing
+
+    fleet, matrix = synthetic_fleet(args.instances, args.days, list(rightsizing.INSTANCE_TYPES))
+    logger.info(f"Generated {matrix.size:,} datapoints ({matrix.nbytes / 1e6:.0f} MB).")
+
+    start = time.perf_counter()
+    profiles = rightsizing.utilization_profiles(matrix)
+    profile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    recommendations = rightsizing.recommend_instance_types(fleet, profiles)
+    rightsizing.recommend_emr_node_mix(recommendations)
+    match_time = time.perf_counter() - start
+
+    result = {
+        'instances': args.instances,
+        'days': args.days,
+        'datapoints': int(matrix.size),
+        'profile_s': round(profile_time, 3),
+        'match_s': round(match_time, 3),
+        'actions': recommendations['Action'].value_counts().to_dict(),
+    }
+    print(f"\n--- Rightsizing Analysis ({args.instances} instances x {args.days} days) ---")
+    print(f"Profiles: {result['profile_s']} s, matching: {result['match_s']} s")
+    print(f"Actions: {result['actions']}")
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir, f"{label}.json")
+    with open(path, 'w') as f:
+        json.dump({
+            'label': label,
+            'timestamp': datetime.datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'result': result,
+        }, f, indent=2)
+    logger.info(f"Rightsizing benchmark results saved at: {path}")
+
+
+if __name__ == "__main__":
+    main()
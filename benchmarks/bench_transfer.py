@@ -0,0 +1,126 @@
+# boto3/benchmarks/bench_transfer.py
+#
+# Upload/download throughput of s3/transfer.py against moto, across a grid of
+# part sizes and worker counts. moto keeps objects in memory, so the numbers
+# measure the client side (mmap reads, hashing, journaling, threading) rather
+# than the network.
+#
+#   python benchmarks/bench_transfer.py --file-size-mb 256 --part-sizes-mb 8,16,64 --workers 1,4,8
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+
+# Make the s3 modules importable the same way the menus do
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 's3'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from moto import mock_aws
+
+from run_benchmarks import RESULTS_DIR, default_label
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MB = 1024 * 1024
+
+
+def write_test_file(path, size, chunk_size=16 * MB):
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining:
+            chunk = min(chunk_size, remaining)
+            f.write(os.urandom(chunk))
+            remaining -= chunk
+
+
+def run_grid(args, work_dir):
+    import transfer
+
+    bucket_name = 'bench-transfer'
+    transfer.s3.create_bucket(Bucket=bucket_name)
+    source = os.path.join(work_dir, 'source.bin')
+    target = os.path.join(work_dir, 'target.bin')
+    journal_dir = os.path.join(work_dir, 'journal')
+    file_size = args.file_size_mb * MB
+    write_test_file(source, file_size)
+
+    results = []
+    for part_size_mb in args.part_sizes_mb:
+        for workers in args.workers:
+            key = f"bench/{part_size_mb}mb-{workers}w.bin"
+
+            start = time.perf_counter()
+            uploaded = transfer.upload_file(source, bucket_name, key, part_size_mb * MB, workers, journal_dir)
+            upload_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            downloaded = transfer.download_file(bucket_name, key, target, part_size_mb * MB, workers, journal_dir)
+            download_time = time.perf_counter() - start
+
+            transfer.s3.delete_object(Bucket=bucket_name, Key=key)
+            if not (uploaded and downloaded):
+                logger.error(f"Transfer failed for part size {part_size_mb} MB with {workers} workers.")
+                continue
+
+            result = {
+                'part_size_mb': part_size_mb,
+                'workers': workers,
+                'upload_mb_s': round(args.file_size_mb / upload_time, 2),
+                'download_mb_s': round(args.file_size_mb / download_time, 2),
+            }
+            logger.info(f"part size {part_size_mb} MB, {workers} workers: "
+                        f"upload {result['upload_mb_s']} MB/s, download {result['download_mb_s']} MB/s")
+            results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark for s3/transfer.py against moto.")
+    parser.add_argument('--file-size-mb', type=int, default=256)
+    parser.add_argument('--part-sizes-mb', default='8,16,64', help="Comma-separated part sizes in MB")
+    parser.add_argument('--workers', default='1,4,8', help="Comma-separated worker counts")
+    parser.add_argument('--label', default=None, help="Name for this run (defaults to git describe)")
+    parser.add_argument('--results-dir', default=os.path.join(RESULTS_DIR, 'transfer'))
+    args = parser.parse_args()
+    args.part_sizes_mb = [int(p) for p in args.part_sizes_mb.split(',')]
+    args.workers = [int(w) for w in args.workers.split(',')]
+
+    logging.basicConfig(level=logging.WARNING)
+    label = args.label or default_label()
+
+    # moto never sees these, but boto3 refuses to sign requests without them
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
+
+    with mock_aws(), tempfile.TemporaryDirectory() as work_dir:
+        results = run_grid(args, work_dir)
+
+    print(f"\n--- Transfer Throughput ({args.file_size_mb} MB file) ---")
+    print(f"{'Part size':>10} {'Workers':>8} {'Upload MB/s':>12} {'Download MB/s':>14}")
+    for r in results:
+        print(f"{r['part_size_mb']:>7} MB {r['workers']:>8} {r['upload_mb_s']:>12} {r['download_mb_s']:>14}")
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir, f"{label}.json")
+    with open(path, 'w') as f:
+        json.dump({
+            'label': label,
+            'timestamp': datetime.datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'file_size_mb': args.file_size_mb,
+            'results': results,
+        }, f, indent=2)
+    logger.info(f"Transfer benchmark results saved at: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+EC2_METRICS = ['CPUUtilization', 'EBSReadBytes', 'EBSWriteBytes', 'NetworkIn', 'NetworkOut']
+
+
+def seed_instances(ec2, instance_count, instance_type='t3.micro', batch_size=1000):
+    """Launches a synthetic EC2 fleet of the given size in batches."""
+    image_id = ec2.describe_images()['Images'][0]['ImageId']
+    launched = 0
+    while launched < instance_count:
+        count = min(batch_size, instance_count - launched)
+        ec2.run_instances(ImageId=image_id, InstanceType=instance_type, MinCount=count, MaxCount=count)
+        launched += count
+    logger.info(f"Seeded {launched} EC2 instances.")
+    return launched
+
+
+def seed_buckets(s3, bucket_count, keys_per_bucket, object_size=128):
+    """Creates synthetic buckets, each holding keys_per_bucket small objects."""
+    body = b'x' * object_size
+    buckets = []
+    for b in range(bucket_count):
+        bucket_name = f"bench-bucket-{b:05d}"
+        s3.create_bucket(Bucket=bucket_name)
+        for k in range(keys_per_bucket):
+            s3.put_object(Bucket=bucket_name, Key=f"data/part-{k:08d}", Body=body)
+        buckets.append(bucket_name)
+    logger.info(f"Seeded {bucket_count} buckets with {keys_per_bucket} objects each.")
+    return buckets
+
+
+def seed_clusters(emr, cluster_count, instance_type='m5.xlarge', instance_count=3):
+    """Starts synthetic EMR clusters shaped like the ones create_cluster builds."""
+    cluster_ids = []
+    for c in range(cluster_count):
+        response = emr.run_job_flow(
+            Name=f"bench-cluster-{c:03d}",
+            ReleaseLabel='emr-6.3.0',
+            Instances={
+                'InstanceGroups': [
+                    {
+                        'Name': 'Master nodes',
+                        'Market': 'ON_DEMAND',
+                        'InstanceRole': 'MASTER',
+                        'InstanceType': instance_type,
+                        'InstanceCount': 1,
+                    },
+                    {
+                        'Name': 'Core nodes',
+                        'Market': 'ON_DEMAND',
+                        'InstanceRole': 'CORE',
+                        'InstanceType': instance_type,
+                        'InstanceCount': instance_count - 1,
+                    }
+                ],
+                'KeepJobFlowAliveWhenNoSteps': True,
+                'TerminationProtected': False,
+            },
+            ServiceRole='EMR_DefaultRole',
+            JobFlowRole='EMR_EC2_DefaultRole',
+            VisibleToAllUsers=True,
+        )
+        cluster_ids.append(response['JobFlowId'])
+    logger.info(f"Seeded {cluster_count} EMR clusters.")
+    return cluster_ids
+
+
+def seed_instance_metrics(cloudwatch, instance_ids, datapoints_per_metric, period=300):
+    """Publishes 5-minute EC2 datapoints ending now for every instance and metric."""
+    now = datetime.datetime.utcnow()
+    batch = []
+    published = 0
+    for instance_id in instance_ids:
+        for metric_name in EC2_METRICS:
+            for i in range(datapoints_per_metric):
+                batch.append({
+                    'MetricName': metric_name,
+                    'Dimensions': [{'Name': 'InstanceId', 'Value': instance_id}],
+                    'Timestamp': now - datetime.timedelta(seconds=period * (i + 1)),
+                    'Value': float((i * 7) % 100),
+                })
+                if len(batch) == 1000:
+                    cloudwatch.put_metric_data(Namespace='AWS/EC2', MetricData=batch)
+                    published += len(batch)
+                    batch = []
+    if batch:
+        cloudwatch.put_metric_data(Namespace='AWS/EC2', MetricData=batch)
+        published += len(batch)
+    logger.info(f"Seeded {published} CloudWatch datapoints.")
+    return published
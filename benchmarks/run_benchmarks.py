@@ -0,0 +1,283 @@
+# boto3/benchmarks/run_benchmarks.py
+#
+# Offline benchmarks for the EC2/S3/EMR hot paths. Every AWS call is served by
+# moto, so the suite needs no credentials and makes no network traffic.
+#
+#   python benchmarks/run_benchmarks.py --label v1.2
+#   python benchmarks/run_benchmarks.py --instances 500 --buckets 20 --keys-per-bucket 100 --clusters 5
+
+import argparse
+import builtins
+import contextlib
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+# Make the service packages importable the same way the menus do
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 's3'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import botocore.client
+from moto import mock_aws
+
+import fleet
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+class ApiCallCounter:
+    """Counts API calls made through the clients it is attached to, per operation."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self._attached = set()
+
+    def attach_module_clients(self, *modules):
+        for module in modules:
+            for value in vars(module).values():
+                if isinstance(value, botocore.client.BaseClient) and id(value) not in self._attached:
+                    value.meta.events.register('before-call', self._count)
+                    self._attached.add(id(value))
+
+    def _count(self, model, **kwargs):
+        self.calls[f"{model.service_model.service_name}.{model.name}"] += 1
+
+    def reset(self):
+        self.calls.clear()
+
+
+@contextlib.contextmanager
+def scripted_input(answers):
+    """Feeds the given answers to input() so interactive functions can be timed."""
+    answers = iter(answers)
+    original_input = builtins.input
+    builtins.input = lambda prompt='': next(answers)
+    try:
+        yield
+    finally:
+        builtins.input = original_input
+
+
+def measure(name, func, counter):
+    """
+    Runs func twice: a timed pass that also counts API calls, then a second
+    pass under tracemalloc for peak memory. Tracing slows allocation-heavy
+    code several times over, so it never overlaps the timed pass.
+    """
+    counter.reset()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        result = func()
+        wall_time = time.perf_counter() - start
+    calls_made = dict(counter.calls)
+
+    tracemalloc.start()
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    calls = dict(sorted(calls_made.items()))
+    logger.info(f"{name}: {wall_time:.3f}s, {peak / 1024 / 1024:.2f} MB peak, {sum(calls.values())} API calls")
+    return result, {
+        'name': name,
+        'wall_time_s': round(wall_time, 4),
+        'peak_memory_mb': round(peak / 1024 / 1024, 3),
+        'api_calls': sum(calls.values()),
+        'api_calls_by_operation': calls,
+    }
+
+
+def run_suite(args):
+    """Seeds the synthetic fleet and times each hot path against it."""
+    import boto3
+
+    fleet.seed_instances(boto3.client('ec2'), args.instances)
+    fleet.seed_buckets(boto3.client('s3'), args.buckets, args.keys_per_bucket)
+    cluster_ids = fleet.seed_clusters(boto3.client('emr'), args.clusters)
+
+    # Imported under the mock so their module-level clients talk to moto
+    from ec2 import instance_operations
+    from emr import monitoring as emr_monitoring
+    import s3_operations
+    import monitoring as s3_monitoring
+    import alert as s3_alert
+
+    # The s3 modules reset the root logger to INFO on import
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    emr = boto3.client('emr')
+    node_ids = [
+        instance['Ec2InstanceId']
+        for cluster_id in cluster_ids
+        for instance in emr.list_instances(ClusterId=cluster_id)['Instances']
+    ]
+    fleet.seed_instance_metrics(boto3.client('cloudwatch'), node_ids, args.datapoints)
+
+    counter = ApiCallCounter()
+    counter.attach_module_clients(instance_operations, emr_monitoring, s3_operations, s3_monitoring, s3_alert)
+
+    results = []
+
+    _, stats = measure('list_all_instances', instance_operations.list_all_instances, counter)
+    results.append(stats)
+
+    _, stats = measure('show_usage', s3_operations.show_usage, counter)
+    results.append(stats)
+
+    def manage_alerts():
+        with scripted_input(['on', '1024', '100000', 'bench@example.com']):
+            return s3_alert.manage_alerts()
+
+    _, stats = measure('manage_alerts', manage_alerts, counter)
+    results.append(stats)
+
+    def fetch_all_clusters():
+        cluster_metrics = []
+        for cluster_id in cluster_ids:
+            cluster_metrics.extend(emr_monitoring.fetch_complete_cluster_metrics(cluster_id))
+        return cluster_metrics
+
+    cluster_metrics, stats = measure('fetch_complete_cluster_metrics', fetch_all_clusters, counter)
+    results.append(stats)
+
+    with tempfile.TemporaryDirectory() as report_dir:
+        cwd = os.getcwd()
+        os.chdir(report_dir)
+        try:
+            _, stats = measure('save_cluster_report_to_csv',
+                               lambda: emr_monitoring.save_cluster_report_to_csv(cluster_metrics), counter)
+        finally:
+            os.chdir(cwd)
+    results.append(stats)
+
+    return results
+
+
+def default_label():
+    try:
+        return subprocess.check_output(
+            ['git', 'describe', '--always', '--dirty'], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return 'local'
+
+
+def load_baseline(results_dir, label, baseline_label=None):
+    """Loads the named baseline, or the most recent stored run other than label."""
+    if baseline_label:
+        path = os.path.join(results_dir, f"{baseline_label}.json")
+        if not os.path.exists(path):
+            logger.error(f"Baseline results '{path}' not found.")
+            return None
+    else:
+        candidates = [
+            os.path.join(results_dir, name) for name in os.listdir(results_dir)
+            if name.endswith('.json') and name != f"{label}.json"
+        ] if os.path.isdir(results_dir) else []
+        if not candidates:
+            return None
+        path = max(candidates, key=os.path.getmtime)
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_to_baseline(run, baseline, tolerance):
+    """Prints a side-by-side comparison and returns the names of regressed benchmarks."""
+    previous = {result['name']: result for result in baseline['results']}
+    regressions = []
+
+    print(f"\n--- Comparison against '{baseline['label']}' ---")
+    for result in run['results']:
+        old = previous.get(result['name'])
+        if not old:
+            print(f"{result['name']}: no baseline")
+            continue
+
+        slower = result['wall_time_s'] > old['wall_time_s'] * (1 + tolerance)
+        heavier = result['peak_memory_mb'] > old['peak_memory_mb'] * (1 + tolerance)
+        chattier = result['api_calls'] > old['api_calls']
+        flag = ' REGRESSION' if slower or heavier or chattier else ''
+        if flag:
+            regressions.append(result['name'])
+        print(f"{result['name']}: wall {old['wall_time_s']:.3f}s -> {result['wall_time_s']:.3f}s, "
+              f"memory {old['peak_memory_mb']:.2f} -> {result['peak_memory_mb']:.2f} MB, "
+              f"API calls {old['api_calls']} -> {result['api_calls']}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the EC2/S3/EMR hot paths.")
+    parser.add_argument('--instances', type=int, default=10000)
+    parser.add_argument('--buckets', type=int, default=1000)
+    parser.add_argument('--keys-per-bucket', type=int, default=1000)
+    parser.add_argument('--clusters', type=int, default=50)
+    parser.add_argument('--datapoints', type=int, default=12, help="5-minute datapoints per node metric")
+    parser.add_argument('--label', default=None, help="Name for this run (defaults to git describe)")
+    parser.add_argument('--baseline', default=None, help="Label of the run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown before flagging")
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    label = args.label or default_label()
+
+    # moto never sees these, but boto3 refuses to sign requests without them
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
+
+    with mock_aws():
+        results = run_suite(args)
+
+    run = {
+        'label': label,
+        'timestamp': datetime.datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'scale': {
+            'instances': args.instances,
+            'buckets': args.buckets,
+            'keys_per_bucket': args.keys_per_bucket,
+            'clusters': args.clusters,
+            'datapoints': args.datapoints,
+        },
+        'results': results,
+    }
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    baseline = load_baseline(args.results_dir, label, args.baseline)
+    path = os.path.join(args.results_dir, f"{label}.json")
+    with open(path, 'w') as f:
+        json.dump(run, f, indent=2)
+    logger.info(f"Benchmark results saved at: {path}")
+
+    if baseline and baseline.get('scale') != run['scale']:
+        # Numbers from a different fleet size are not comparable
+        logger.warning(f"Baseline '{baseline['label']}' was run at a different scale ({baseline.get('scale')}); "
+                       f"skipping the comparison.")
+    elif baseline:
+        regressions = compare_to_baseline(run, baseline, args.tolerance)
+        if regressions:
+            logger.error(f"Regressions detected in: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
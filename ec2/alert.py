@@ -28,6 +28,9 @@ def subscribe_to_sns(topic_arn, email):
     """
     Subscribes an email address to the SNS topic for alerts.
     """
+    if not email:
+        logger.info("No email address given. Skipping the email subscription.")
+        return
     try:
         sns.subscribe(
             TopicArn=topic_arn,
@@ -0,0 +1,164 @@
+import boto3
+import logging
+
+logger = logging.getLogger(__name__)
+ec2 = boto3.client('ec2')
+cloudwatch = boto3.client('cloudwatch')
+
+ASG_TAG = 'aws:autoscaling:groupName'
+PER_INSTANCE_CPU_PREFIX = 'HighCPUUtilization-'
+FLEET_CPU_PREFIX = 'FleetMaxCPU-'
+MAX_INSTANCES_PER_QUERY = 40  # keeps each Metrics Insights query well under its length limit
+DELETE_ALARMS_BATCH = 100  # DeleteAlarms limit
+
+
+def group_running_instances(tag_key=None):
+    """
+    Groups running instances by Auto Scaling group, or by the value of tag_key
+    for instances outside an ASG. Returns {(kind, name): [instance ids]}.
+    """
+    groups = {}
+    for page in ec2.get_paginator('describe_instances').paginate(
+            Filters=[{'Name': 'instance-state-name', 'Values': ['running']}]):
+        for reservation in page['Reservations']:
+            for instance in reservation['Instances']:
+                tags = {t['Key']: t['Value'] for t in instance.get('Tags', [])}
+                if ASG_TAG in tags:
+                    key = ('asg', tags[ASG_TAG])
+                elif tag_key and tag_key in tags:
+                    key = ('tag', f"{tag_key}={tags[tag_key]}")
+                else:
+                    key = ('tag', 'untagged')
+                groups.setdefault(key, []).append(instance['InstanceId'])
+    return groups
+
+
+def _quote(value):
+    """A Metrics Insights string literal, with quotes and backslashes escaped."""
+    if any(ord(c) < 32 for c in value):
+        raise ValueError(f"{value!r} contains control characters, which a Metrics Insights query cannot hold")
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def _fleet_queries(kind, name, instance_ids):
+    """
+    Metrics Insights queries for the max CPU of a group: one query per ASG, or
+    one per chunk of instances for tag groups.
+    """
+    if kind == 'asg':
+        return [(f"{FLEET_CPU_PREFIX}asg-{name}",
+                 f"SELECT MAX(CPUUtilization) FROM SCHEMA(\"AWS/EC2\", AutoScalingGroupName) "
+                 f"WHERE AutoScalingGroupName = {_quote(name)}")]
+
+    queries = []
+    instance_ids = sorted(instance_ids)
+    for offset in range(0, len(instance_ids), MAX_INSTANCES_PER_QUERY):
+        chunk = instance_ids[offset:offset + MAX_INSTANCES_PER_QUERY]
+        condition = ' OR '.join(f"InstanceId = '{i}'" for i in chunk)
+        queries.append((f"{FLEET_CPU_PREFIX}{name}-{offset // MAX_INSTANCES_PER_QUERY + 1}",
+                        f"SELECT MAX(CPUUtilization) FROM SCHEMA(\"AWS/EC2\", InstanceId) WHERE {condition}"))
+    return queries
+
+
+def _existing_alarm_names(prefix):
+    names = []
+    for page in cloudwatch.get_paginator('describe_alarms').paginate(
+            AlarmNamePrefix=prefix, AlarmTypes=['MetricAlarm']):
+        names.extend(alarm['AlarmName'] for alarm in page['MetricAlarms'])
+    return set(names)
+
+
+def _delete_alarms(alarm_names):
+    for offset in range(0, len(alarm_names), DELETE_ALARMS_BATCH):
+        try:
+            cloudwatch.delete_alarms(AlarmNames=alarm_names[offset:offset + DELETE_ALARMS_BATCH])
+        except Exception as e:
+            logger.error(f"Error deleting alarms: {e}")
+
+
+def plan_fleet_cpu_alarms(tag_key=None):
+    """
+    Plans one fleet-level max-CPU alarm per group and shows how many
+    per-instance alarms (existing, or needed for full coverage) each replaces.
+    """
+    groups = group_running_instances(tag_key)
+    existing = _existing_alarm_names(PER_INSTANCE_CPU_PREFIX)
+    plan = []
+    for (kind, name), instance_ids in sorted(groups.items()):
+        try:
+            queries = _fleet_queries(kind, name, instance_ids)
+        except ValueError as e:
+            logger.error(f"Skipping group '{kind}:{name}': {e}")
+            continue
+        plan.append({
+            'Group': f"{kind}:{name}",
+            'Instances': len(instance_ids),
+            'ExistingPerInstanceAlarms': sum(1 for i in instance_ids if f"{PER_INSTANCE_CPU_PREFIX}{i}" in existing),
+            'FleetAlarms': len(queries),
+            'Queries': queries,
+            'InstanceIds': instance_ids,
+        })
+
+    print("\n--- Fleet CPU Alarm Plan ---")
+    for row in plan:
+        print(f"{row['Group']}: {row['Instances']} instances, {row['ExistingPerInstanceAlarms']} per-instance alarms "
+              f"-> {row['FleetAlarms']} fleet alarm(s)")
+    print(f"Total: {sum(r['Instances'] for r in plan)} per-instance alarms for full coverage "
+          f"({sum(r['ExistingPerInstanceAlarms'] for r in plan)} existing) -> "
+          f"{sum(r['FleetAlarms'] for r in plan)} fleet alarms\n")
+    return plan
+
+
+def setup_fleet_cpu_alarms(threshold, sns_topic_arn, tag_key=None, remove_replaced=False):
+    """
+    Creates or updates one Metrics Insights alarm on max CPU per group. With
+    remove_replaced, the per-instance CPU alarms of the planned instances whose
+    group got all of its fleet alarms in this run are deleted.
+    """
+    plan = plan_fleet_cpu_alarms(tag_key)
+    covered_ids = []
+    for row in plan:
+        created = 0
+        for alarm_name, query in row['Queries']:
+            try:
+                # put_metric_alarm is an upsert, so re-running reconciles group membership
+                cloudwatch.put_metric_alarm(
+                    AlarmName=alarm_name,
+                    ComparisonOperator='GreaterThanThreshold',
+                    EvaluationPeriods=2,
+                    Threshold=threshold,
+                    ActionsEnabled=True,
+                    AlarmActions=[sns_topic_arn],
+                    TreatMissingData='notBreaching',
+                    Metrics=[{
+                        'Id': 'fleet_max_cpu',
+                        'Expression': query,
+                        'Period': 300,  # 5 minutes
+                        'ReturnData': True,
+                    }],
+                )
+                logger.info(f"Fleet CPU alarm '{alarm_name}' set with a threshold of {threshold}%.")
+                created += 1
+            except Exception as e:
+                logger.error(f"Error setting up fleet CPU alarm '{alarm_name}': {e}")
+        if created == len(row['Queries']):
+            covered_ids.extend(row['InstanceIds'])
+
+    # Groups that disappeared or shrank leave fleet alarms behind
+    planned = {alarm_name for row in plan for alarm_name, _ in row['Queries']}
+    stale = sorted(_existing_alarm_names(FLEET_CPU_PREFIX) - planned)
+    if stale:
+        _delete_alarms(stale)
+        logger.info(f"Removed {len(stale)} fleet CPU alarms for groups that no longer exist.")
+
+    if remove_replaced:
+        existing = _existing_alarm_names(PER_INSTANCE_CPU_PREFIX)
+        # Instances of skipped or failed groups, and any launched since the plan, keep their alarms
+        covered = [
+            f"{PER_INSTANCE_CPU_PREFIX}{instance_id}"
+            for instance_id in covered_ids
+            if f"{PER_INSTANCE_CPU_PREFIX}{instance_id}" in existing
+        ]
+        _delete_alarms(covered)
+        logger.info(f"Removed {len(covered)} per-instance CPU alarms replaced by fleet alarms.")
+    return plan
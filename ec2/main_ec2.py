@@ -9,6 +9,7 @@ from ec2.instance_operations import start_instance, stop_instance, reboot_instan
 from ec2.status_check import check_instance_status
 from ec2.threshold_alarms import setup_cpu_alarm, setup_status_check_alarm
 from ec2.alert import create_or_get_sns_topic, subscribe_to_sns
+from ec2.fleet_alarms import plan_fleet_cpu_alarms, setup_fleet_cpu_alarms
 
 
 # Set up logging
@@ -25,7 +26,8 @@ def main_menu():
         print("5. Setup CPU Utilization Alarm")
         print("6. Setup Status Check Alarm")
         print("7. List All EC2 Instances")
-        print("8. Exit")
+        print("8. Setup Fleet CPU Alarms")
+        print("9. Exit")
 
         choice = input("Select an option: ").strip()
 
@@ -46,19 +48,30 @@ def main_menu():
             threshold = float(input("Enter the CPU utilization threshold (%): "))
             topic_name = "HighCPUUtilizationAlerts"
             sns_topic_arn = create_or_get_sns_topic(topic_name)
-            email = input("Enter the email address to receive alerts: ")
+            email = input("Enter the email address to receive alerts (leave blank to skip): ").strip()
             subscribe_to_sns(sns_topic_arn, email)
             setup_cpu_alarm(instance_id, threshold, sns_topic_arn)
         elif choice == '6':
             instance_id = input("Enter the Instance ID: ")
             topic_name = "InstanceStatusCheckAlerts"
             sns_topic_arn = create_or_get_sns_topic(topic_name)
-            email = input("Enter the email address to receive alerts: ")
+            email = input("Enter the email address to receive alerts (leave blank to skip): ").strip()
             subscribe_to_sns(sns_topic_arn, email)
             setup_status_check_alarm(instance_id, sns_topic_arn)
         elif choice == '7':
             list_all_instances()
         elif choice == '8':
+            tag_key = input("Group non-ASG instances by tag key (optional): ").strip() or None
+            plan_fleet_cpu_alarms(tag_key)
+            if input("Create these fleet alarms? (y/n): ").strip().lower() == 'y':
+                threshold = float(input("Enter the CPU utilization threshold (%): "))
+                topic_name = "HighCPUUtilizationAlerts"
+                sns_topic_arn = create_or_get_sns_topic(topic_name)
+                email = input("Enter the email address to receive alerts (leave blank to skip): ").strip()
+                subscribe_to_sns(sns_topic_arn, email)
+                remove_replaced = input("Delete the per-instance CPU alarms they replace? (y/n): ").strip().lower() == 'y'
+                setup_fleet_cpu_alarms(threshold, sns_topic_arn, tag_key, remove_replaced)
+        elif choice == '9':
             logger.info("Exiting...")
             sys.exit(0)
         else:
@@ -21,6 +21,9 @@ def create_or_get_sns_topic(topic_name):
         return None
 
 def subscribe_to_sns(topic_arn, email):
+    if not email:
+        logger.info("No email address given. Skipping the email subscription.")
+        return
     try:
         sns.subscribe(
             TopicArn=topic_arn,
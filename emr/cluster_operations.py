@@ -4,6 +4,8 @@ import logging
 logger = logging.getLogger(__name__)
 emr = boto3.client('emr')
 
+LOG_URI = 's3://madhan-emr/monthly_bill/2024-09/logs/'
+
 def create_cluster(cluster_name, instance_type, instance_count, release_label='emr-6.3.0'):
     try:
         response = emr.run_job_flow(
@@ -34,7 +36,7 @@ def create_cluster(cluster_name, instance_type, instance_count, release_label='e
                 {'Name': 'Hadoop'},
                 {'Name': 'Spark'},
             ],
-            LogUri='s3://madhan-emr/monthly_bill/2024-09/logs/',
+            LogUri=LOG_URI,
             ServiceRole='EMR_DefaultRole',
             JobFlowRole='EMR_EC2_DefaultRole',
             VisibleToAllUsers=True,
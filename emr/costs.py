@@ -0,0 +1,265 @@
+# boto3/emr/costs.py
+import boto3
+import datetime
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from botocore.config import Config
+
+from emr.rightsizing import INSTANCE_TYPES
+
+logger = logging.getLogger(__name__)
+
+# The EMR List*/Describe* APIs throttle early; adaptive retries back off instead of failing
+emr = boto3.client('emr', config=Config(max_pool_connections=32, retries={'mode': 'adaptive', 'max_attempts': 10}))
+cloudwatch = boto3.client('cloudwatch', config=Config(max_pool_connections=32))
+
+COST_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.aws-boto3-emr-costs.db')
+DEFAULT_MAX_WORKERS = 8
+MAX_METRIC_DATA_QUERIES = 500  # GetMetricData limit per request
+FINAL_STATES = {'TERMINATED', 'TERMINATED_WITH_ERRORS'}
+ALL_STATES = ['STARTING', 'BOOTSTRAPPING', 'RUNNING', 'WAITING', 'TERMINATING', 'TERMINATED', 'TERMINATED_WITH_ERRORS']
+
+# Approximations: the EMR charge on top of EC2 is roughly a quarter of the EC2
+# on-demand price for current families, and spot capacity runs at about a third of it
+EMR_UPLIFT = 0.25
+SPOT_PRICE_FRACTION = 0.35
+# Types missing from the price table are priced by normalized size (large = 4 units, as EMR counts them)
+NORMALIZED_UNIT_PRICE = INSTANCE_TYPES['m5.large'][2] / 4
+NORMALIZATION_FACTORS = {
+    'nano': 0.25, 'micro': 0.5, 'small': 1, 'medium': 2, 'large': 4, 'xlarge': 8, '2xlarge': 16, '4xlarge': 32,
+    '8xlarge': 64, '9xlarge': 72, '10xlarge': 80, '12xlarge': 96, '16xlarge': 128, '18xlarge': 144,
+    '24xlarge': 192, '32xlarge': 256,
+}
+
+
+def open_cost_cache(cache_path=COST_CACHE_PATH):
+    conn = sqlite3.connect(cache_path, check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS clusters ("
+        "cluster_id TEXT PRIMARY KEY, name TEXT, state TEXT, created TEXT, ended TEXT, "
+        "collection_type TEXT, normalized_hours REAL, instance_hours REAL, cost REAL, "
+        "vcpu_hours REAL, useful_vcpu_hours REAL, steps INTEGER)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS steps ("
+        "cluster_id TEXT, step_id TEXT, name TEXT, state TEXT, started TEXT, ended TEXT, "
+        "hours REAL, cost REAL, PRIMARY KEY (cluster_id, step_id))"
+    )
+    return conn
+
+
+def hourly_price(instance_type, market='ON_DEMAND'):
+    """EC2 plus EMR hourly price for one instance from the local price table."""
+    if instance_type in INSTANCE_TYPES:
+        ec2_price = INSTANCE_TYPES[instance_type][2]
+    else:
+        ec2_price = NORMALIZATION_FACTORS.get(instance_type.split('.')[-1], 4) * NORMALIZED_UNIT_PRICE
+    emr_price = ec2_price * EMR_UPLIFT
+    if market == 'SPOT':
+        ec2_price *= SPOT_PRICE_FRACTION
+    return ec2_price + emr_price
+
+
+def _overlap_hours(start, end, window_start, window_end):
+    return max(0.0, (min(end, window_end) - max(start, window_start)).total_seconds() / 3600)
+
+
+def _utc_iso(timestamp):
+    # botocore returns local-time datetimes; the cache compares ISO strings, so store UTC
+    return timestamp.astimezone(datetime.timezone.utc).isoformat()
+
+
+def list_cluster_summaries(months=3):
+    """Pages through every cluster created in the last N months, in any state."""
+    created_after = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=30 * months)
+    clusters = []
+    for page in emr.get_paginator('list_clusters').paginate(CreatedAfter=created_after, ClusterStates=ALL_STATES):
+        clusters.extend(page['Clusters'])
+    return clusters
+
+
+def list_cluster_instances(cluster_id):
+    """Every instance the cluster ever ran, with its lifetime, type and market."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    instances = []
+    for page in emr.get_paginator('list_instances').paginate(ClusterId=cluster_id):
+        for instance in page['Instances']:
+            timeline = instance['Status'].get('Timeline', {})
+            if 'CreationDateTime' not in timeline or 'Ec2InstanceId' not in instance:
+                continue  # requested but never launched
+            instances.append({
+                'InstanceId': instance['Ec2InstanceId'],
+                'InstanceType': instance.get('InstanceType', ''),
+                'Market': instance.get('Market', 'ON_DEMAND'),
+                'Start': timeline['CreationDateTime'],
+                'End': timeline.get('EndDateTime', now),
+            })
+    return instances
+
+
+def fetch_average_cpu(instances):
+    """Average CPUUtilization of each instance over its own lifetime, one hourly query per instance."""
+    if not instances:
+        return {}
+    averages = {}
+    start_time = min(i['Start'] for i in instances)
+    end_time = max(i['End'] for i in instances)
+    for offset in range(0, len(instances), MAX_METRIC_DATA_QUERIES):
+        batch = instances[offset:offset + MAX_METRIC_DATA_QUERIES]
+        queries = [
+            {
+                'Id': f"i{offset + n}",
+                'MetricStat': {
+                    'Metric': {
+                        'Namespace': 'AWS/EC2',
+                        'MetricName': 'CPUUtilization',
+                        'Dimensions': [{'Name': 'InstanceId', 'Value': instance['InstanceId']}],
+                    },
+                    'Period': 3600,
+                    'Stat': 'Average',
+                },
+            }
+            for n, instance in enumerate(batch)
+        ]
+        values = {}
+        for page in cloudwatch.get_paginator('get_metric_data').paginate(
+                MetricDataQueries=queries, StartTime=start_time, EndTime=end_time + datetime.timedelta(hours=1)):
+            for result in page['MetricDataResults']:
+                values.setdefault(result['Id'], []).extend(result['Values'])
+        for key, series in values.items():
+            if series:
+                averages[instances[int(key[1:])]['InstanceId']] = sum(series) / len(series)
+    return averages
+
+
+def collect_cluster_costs(cluster_id):
+    """
+    Cost of one cluster from the lifetimes of its instances, per step for the
+    cluster cost accrued during each step, and per vCPU-hour actually used.
+    Steps running concurrently each carry the full cluster cost of their window.
+    """
+    cluster = emr.describe_cluster(ClusterId=cluster_id)['Cluster']
+    timeline = cluster['Status']['Timeline']
+    now = datetime.datetime.now(datetime.timezone.utc)
+    instances = list_cluster_instances(cluster_id)
+    average_cpu = fetch_average_cpu(instances)
+
+    cost = instance_hours = vcpu_hours = useful_vcpu_hours = 0.0
+    for instance in instances:
+        hours = (instance['End'] - instance['Start']).total_seconds() / 3600
+        instance['Rate'] = hourly_price(instance['InstanceType'], instance['Market'])
+        cost += hours * instance['Rate']
+        instance_hours += hours
+        vcpus = INSTANCE_TYPES.get(instance['InstanceType'], (None,))[0]
+        if vcpus:
+            vcpu_hours += hours * vcpus
+            if instance['InstanceId'] in average_cpu:
+                useful_vcpu_hours += hours * vcpus * average_cpu[instance['InstanceId']] / 100
+
+    steps = []
+    for page in emr.get_paginator('list_steps').paginate(ClusterId=cluster_id):
+        for step in page['Steps']:
+            step_timeline = step['Status'].get('Timeline', {})
+            if 'StartDateTime' not in step_timeline:
+                continue  # cancelled before it ran
+            started, ended = step_timeline['StartDateTime'], step_timeline.get('EndDateTime', now)
+            steps.append((
+                cluster_id, step['Id'], step['Name'], step['Status']['State'], _utc_iso(started), _utc_iso(ended),
+                round((ended - started).total_seconds() / 3600, 4),
+                round(sum(_overlap_hours(i['Start'], i['End'], started, ended) * i['Rate'] for i in instances), 4),
+            ))
+
+    summary = (
+        cluster_id, cluster['Name'], cluster['Status']['State'],
+        _utc_iso(timeline['CreationDateTime']),
+        _utc_iso(timeline['EndDateTime']) if 'EndDateTime' in timeline else None,
+        cluster.get('InstanceCollectionType', 'INSTANCE_GROUP'),
+        cluster.get('NormalizedInstanceHours', 0), round(instance_hours, 4), round(cost, 4),
+        round(vcpu_hours, 4), round(useful_vcpu_hours, 4), len(steps),
+    )
+    return summary, steps
+
+
+def sync_cluster_costs(months=3, max_workers=DEFAULT_MAX_WORKERS, cache_path=COST_CACHE_PATH):
+    """
+    Collects costs for every cluster of the last N months in parallel and
+    stores them in the local cache. Clusters cached in a terminated state
+    are never fetched again, so monthly runs only pay for new clusters.
+    """
+    conn = open_cost_cache(cache_path)
+    try:
+        done = {row[0] for row in conn.execute(
+            f"SELECT cluster_id FROM clusters WHERE state IN ({','.join('?' * len(FINAL_STATES))})", sorted(FINAL_STATES))}
+        pending = [c['Id'] for c in list_cluster_summaries(months) if c['Id'] not in done]
+        logger.info(f"Collecting costs for {len(pending)} clusters ({len(done)} already cached).")
+
+        def collect(cluster_id):
+            try:
+                return collect_cluster_costs(cluster_id)
+            except Exception as e:
+                logger.error(f"Error collecting costs for EMR cluster '{cluster_id}': {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for result in executor.map(collect, pending):
+                if result is None:
+                    continue
+                summary, steps = result
+                conn.execute("INSERT OR REPLACE INTO clusters VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", summary)
+                conn.executemany("INSERT OR REPLACE INTO steps VALUES (?, ?, ?, ?, ?, ?, ?, ?)", steps)
+        conn.commit()
+    finally:
+        conn.close()
+    return len(pending)
+
+
+def load_cost_report(months=3, cache_path=COST_CACHE_PATH):
+    """Returns (per-cluster, per-step) DataFrames for clusters created in the last N months."""
+    since = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=30 * months)).isoformat()
+    conn = open_cost_cache(cache_path)
+    try:
+        clusters = pd.read_sql_query("SELECT * FROM clusters WHERE created >= ? ORDER BY cost DESC", conn, params=(since,))
+        steps = pd.read_sql_query(
+            "SELECT steps.* FROM steps JOIN clusters USING (cluster_id) WHERE clusters.created >= ? "
+            "ORDER BY steps.cost DESC", conn, params=(since,))
+    finally:
+        conn.close()
+    clusters['cost_per_useful_vcpu_hour'] = (
+        clusters['cost'] / clusters['useful_vcpu_hours'].where(clusters['useful_vcpu_hours'] > 0)).round(4)
+    clusters['cpu_efficiency_pct'] = (
+        100 * clusters['useful_vcpu_hours'] / clusters['vcpu_hours'].where(clusters['vcpu_hours'] > 0)).round(1)
+    return clusters, steps
+
+
+def print_cost_summary(clusters, steps, top=10):
+    if clusters.empty:
+        logger.info("No EMR cluster costs found.")
+        return
+    print(f"\n--- EMR Costs: {len(clusters)} clusters, {len(steps)} steps ---")
+    print(f"Total: ${clusters['cost'].sum():,.2f} over {clusters['instance_hours'].sum():,.1f} instance hours "
+          f"({clusters['normalized_hours'].sum():,.0f} normalized)")
+    print(f"\nTop {top} clusters by cost:")
+    for row in clusters.head(top).itertuples():
+        efficiency = '-' if pd.isna(row.cpu_efficiency_pct) else f"{row.cpu_efficiency_pct}% CPU used"
+        print(f"  {row.cluster_id} {row.name}: ${row.cost:,.2f}, {row.steps} steps, {efficiency}")
+    print(f"\nTop {top} steps by cost:")
+    for row in steps.head(top).itertuples():
+        print(f"  {row.cluster_id}/{row.step_id} {row.name}: ${row.cost:,.2f} over {row.hours:.2f} h ({row.state})")
+
+
+def save_cost_report_to_csv(clusters, steps, file_name='EMR_Cost_Report.csv'):
+    if clusters.empty:
+        logger.error("No data available to write to the cost report.")
+        return
+    try:
+        file_path = os.path.join(os.getcwd(), file_name)
+        clusters.to_csv(file_path, index=False)
+        steps_path = os.path.join(os.getcwd(), 'EMR_Step_Cost_Report.csv')
+        steps.to_csv(steps_path, index=False)
+        logger.info(f"EMR cost reports saved at: {file_path} and {steps_path}")
+    except Exception as e:
+        logger.error(f"Failed to save the cost report to CSV: {e}")
@@ -7,10 +7,14 @@ import logging
 # Ensure the parent directory is in sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from emr.cluster_operations import create_cluster, terminate_cluster, list_clusters
+from emr.cluster_operations import create_cluster, terminate_cluster, list_clusters, LOG_URI
 from emr.scaling import add_instance_group, modify_instance_group
-from emr.monitoring import setup_emr_alarm, fetch_complete_cluster_metrics, save_cluster_report_to_csv
+from emr.monitoring import (setup_emr_alarm, fetch_complete_cluster_metrics, save_cluster_report_to_csv,
+                            plan_emr_composite_alarms, setup_emr_composite_alarm, watch_cluster)
+from emr.rightsizing import run_rightsizing, save_rightsizing_report_to_csv
+from emr.costs import sync_cluster_costs, load_cost_report, print_cost_summary, save_cost_report_to_csv
 from emr.alert import create_or_get_sns_topic, subscribe_to_sns
+from s3.cleanup import delete_objects_matching, split_s3_uri
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -25,7 +29,12 @@ def main_menu():
         print("4. Add Instance Group")
         print("5. Modify Instance Group")
         print("7. Generate Daily Report")  
-        print("8. Exit")
+        print("8. Clean Up Old Cluster Logs")
+        print("9. Setup Cluster Composite Alarm")
+        print("10. Rightsizing Recommendations")
+        print("11. Watch Cluster (Live)")
+        print("12. Cluster Cost Report")
+        print("13. Exit")
 
         choice = input("Select an option: ").strip()
 
@@ -54,7 +63,7 @@ def main_menu():
             threshold = float(input("Enter the Threshold for the Alarm: "))
             topic_name = f"EMR-{metric_name}-Alerts"
             sns_topic_arn = create_or_get_sns_topic(topic_name)
-            email = input("Enter the Email to Receive Alerts: ")
+            email = input("Enter the Email to Receive Alerts (leave blank to skip): ").strip()
             subscribe_to_sns(sns_topic_arn, email)
             setup_emr_alarm(cluster_id, metric_name, threshold, sns_topic_arn)
         elif choice == '7':
@@ -65,6 +74,34 @@ def main_menu():
                 cluster_metrics = fetch_complete_cluster_metrics(cluster_id)
                 save_cluster_report_to_csv(cluster_metrics)
         elif choice == '8':
+            days = float(input("Delete cluster logs older than N days: "))
+            dry_run = input("Dry run only? (y/n): ").strip().lower() == 'y'
+            bucket_name, prefix = split_s3_uri(LOG_URI)
+            delete_objects_matching(bucket_name, prefix, older_than_days=days, dry_run=dry_run)
+        elif choice == '9':
+            plan_emr_composite_alarms()
+            cluster_id = input("Enter the Cluster ID: ")
+            topic_name = "EMR-ClusterHealth-Alerts"
+            sns_topic_arn = create_or_get_sns_topic(topic_name)
+            email = input("Enter the Email to Receive Alerts (leave blank to skip): ").strip()
+            subscribe_to_sns(sns_topic_arn, email)
+            setup_emr_composite_alarm(cluster_id, sns_topic_arn)
+        elif choice == '10':
+            cluster_ids = [c.strip() for c in input("Enter EMR Cluster IDs to include (comma-separated, blank for none): ").split(',') if c.strip()]
+            days = int(input("Days of utilization to analyze (e.g., 30): ") or 30)
+            recommendations, node_mix = run_rightsizing(cluster_ids, days)
+            save_rightsizing_report_to_csv(recommendations, node_mix)
+        elif choice == '11':
+            cluster_id = input("Enter the Cluster ID to watch: ")
+            period = int(input("Datapoint period in seconds (60 with detailed monitoring, else 300): ") or 60)
+            watch_cluster(cluster_id, interval=period, period=period)
+        elif choice == '12':
+            months = int(input("Months of clusters to include (e.g., 3): ") or 3)
+            sync_cluster_costs(months)
+            clusters, steps = load_cost_report(months)
+            print_cost_summary(clusters, steps)
+            save_cost_report_to_csv(clusters, steps)
+        elif choice == '13':
             logger.info("Exiting...")
             sys.exit(0)
         else:
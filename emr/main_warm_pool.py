@@ -0,0 +1,107 @@
+# boto3/emr/main_warm_pool.py
+#
+# Warm pool of ready EMR clusters for PySpark jobs, and a simulator to size it.
+#
+#   python emr/main_warm_pool.py replenish --pool adhoc --size 2
+#   python emr/main_warm_pool.py run --pool adhoc --script s3://bucket/pyspark.py --task-nodes 4 -- --data_source ... --output_uri ...
+#   python emr/main_warm_pool.py reap --pool adhoc --idle-ttl 1800
+#   python emr/main_warm_pool.py simulate --trace jobs.csv --sizes 0,1,2,4
+
+import sys
+import os
+import argparse
+import logging
+import time
+import uuid
+
+import pandas as pd
+
+# Ensure the parent directory is in sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from emr.warm_pool import WarmPool, default_template, spark_step, DEFAULT_POOL_SIZE, DEFAULT_IDLE_TTL, DEFAULT_MAX_CLUSTERS
+from emr.pool_simulator import compare_pool_sizes, load_trace, synthetic_trace
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 30
+READY_TIMEOUT = 3600  # seconds a leased cluster may take to grow its TASK group
+
+
+def run_job(pool, script_uri, script_args, task_nodes):
+    """
+    Leases a cluster, runs the script as a step, waits for it and returns the
+    cluster to the pool. Re-raises a failed or timed-out job after the release.
+    """
+    job_id = f"job-{uuid.uuid4()}"
+    cluster_id = pool.lease(job_id, task_nodes)
+    while cluster_id is None:
+        time.sleep(POLL_SECONDS)
+        cluster_id = pool.lease(job_id, task_nodes)
+    try:
+        deadline = time.time() + READY_TIMEOUT
+        while not pool.is_ready(cluster_id):
+            if time.time() > deadline:
+                raise RuntimeError(f"Cluster '{cluster_id}' was not ready after {READY_TIMEOUT}s")
+            time.sleep(POLL_SECONDS)
+        step_id = pool.submit(cluster_id, spark_step(script_uri, script_args))
+        logger.info(f"Submitted step '{step_id}' to cluster '{cluster_id}'. Waiting for it to finish...")
+        pool.emr.get_waiter('step_complete').wait(ClusterId=cluster_id, StepId=step_id,
+                                                  WaiterConfig={'Delay': POLL_SECONDS, 'MaxAttempts': 2880})
+        logger.info(f"Step '{step_id}' completed.")
+    except Exception as e:
+        logger.error(f"Error running job on cluster '{cluster_id}': {e}")
+        raise
+    finally:
+        try:
+            pool.release(cluster_id)
+        except Exception as e:
+            logger.error(f"Error returning cluster '{cluster_id}' to the pool: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm pool of EMR clusters for PySpark jobs.")
+    parser.add_argument('command', choices=['status', 'replenish', 'run', 'reap', 'simulate'])
+    parser.add_argument('--pool', default='default')
+    parser.add_argument('--size', type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument('--max-clusters', type=int, default=DEFAULT_MAX_CLUSTERS)
+    parser.add_argument('--idle-ttl', type=int, default=DEFAULT_IDLE_TTL, help="Seconds before surplus free clusters are terminated")
+    parser.add_argument('--instance-type', default='m5.xlarge')
+    parser.add_argument('--core-nodes', type=int, default=2)
+    parser.add_argument('--script', help="S3 URI of the PySpark script to run (run)")
+    parser.add_argument('--task-nodes', type=int, default=0, help="Task nodes to add for the job (run)")
+    parser.add_argument('--trace', help="CSV of arrival_seconds,task_nodes,duration_seconds (simulate)")
+    parser.add_argument('--sizes', default='0,1,2,4', help="Comma-separated pool sizes to compare (simulate)")
+    parser.add_argument('script_args', nargs='*', help="Arguments passed to the PySpark script (run)")
+    args = parser.parse_args()
+
+    template = default_template(args.instance_type, args.core_nodes)
+    if args.command == 'simulate':
+        trace = load_trace(args.trace) if args.trace else synthetic_trace()
+        results = compare_pool_sizes(trace, [int(s) for s in args.sizes.split(',')], idle_ttl=args.idle_ttl,
+                                     max_clusters=args.max_clusters, template=template, instance_type=args.instance_type)
+        print("\n--- Warm Pool Simulation ---")
+        print(pd.DataFrame(results).to_string(index=False))
+        return
+
+    pool = WarmPool(args.pool, args.size, template, args.idle_ttl, args.max_clusters)
+    if args.command == 'status':
+        pool.status()
+    elif args.command == 'replenish':
+        pool.replenish()
+    elif args.command == 'reap':
+        pool.reap()
+    elif args.command == 'run':
+        if not args.script:
+            logger.error("--script is required for run.")
+            sys.exit(1)
+        try:
+            run_job(pool, args.script, args.script_args, args.task_nodes)
+        except Exception:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,18 @@
 # boto3/emr/monitoring.py
 import boto3
+import numpy as np
 import pandas as pd
 import datetime
 import os
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 cloudwatch = boto3.client('cloudwatch')
 emr = boto3.client('emr')
 
+LIVE_INSTANCE_STATES = ['AWAITING_FULFILLMENT', 'PROVISIONING', 'BOOTSTRAPPING', 'RUNNING']
+
 
 def setup_emr_alarm(cluster_id, metric_name, threshold, sns_topic_arn):
     try:
@@ -31,32 +35,91 @@ def setup_emr_alarm(cluster_id, metric_name, threshold, sns_topic_arn):
     except Exception as e:
         logger.error(f"Error setting up {metric_name} alarm for EMR cluster '{cluster_id}': {e}")
 
-def get_instance_group_mapping(cluster_id):
+def _emr_metric_alarms_by_cluster():
+    """Groups the per-metric 'EMR-<metric>-<cluster id>' alarms by cluster ID."""
+    clusters = {}
+    paginator = cloudwatch.get_paginator('describe_alarms')
+    for page in paginator.paginate(AlarmNamePrefix='EMR-', AlarmTypes=['MetricAlarm']):
+        for alarm in page['MetricAlarms']:
+            if '-j-' in alarm['AlarmName']:
+                cluster_id = 'j-' + alarm['AlarmName'].rsplit('-j-', 1)[1]
+                clusters.setdefault(cluster_id, []).append(alarm['AlarmName'])
+    return clusters
+
+def plan_emr_composite_alarms():
+    """
+    Shows what one composite alarm per cluster changes. The metric alarms stay
+    (the composite rule is evaluated over them), so the alarm count grows by one
+    per cluster while the number of alarms that notify drops to one per cluster.
+    """
+    clusters = _emr_metric_alarms_by_cluster()
+    print("\n--- EMR Composite Alarm Plan ---")
+    for cluster_id, alarm_names in sorted(clusters.items()):
+        print(f"{cluster_id}: {len(alarm_names)} notifying metric alarms -> "
+              f"{len(alarm_names)} silent metric alarms + 1 notifying composite alarm")
+    metric_alarms = sum(len(a) for a in clusters.values())
+    print(f"Total: {metric_alarms} alarms, {metric_alarms} notifying -> "
+          f"{metric_alarms + len(clusters)} alarms, {len(clusters)} notifying\n")
+    return clusters
+
+def setup_emr_composite_alarm(cluster_id, sns_topic_arn):
+    """
+    Combines a cluster's per-metric alarms into one composite alarm that owns
+    the notification. The metric alarms stay as the composite's inputs (they
+    cannot be deleted while its rule refers to them) with their actions disabled.
+    """
+    alarm_names = _emr_metric_alarms_by_cluster().get(cluster_id, [])
+    if not alarm_names:
+        logger.warning(f"No EMR metric alarms found for cluster '{cluster_id}'. Set up metric alarms first.")
+        return
+    try:
+        composite_name = f"EMRHealth-{cluster_id}"
+        cloudwatch.put_composite_alarm(
+            AlarmName=composite_name,
+            AlarmRule=' OR '.join(f'ALARM("{name}")' for name in sorted(alarm_names)),
+            ActionsEnabled=True,
+            AlarmActions=[sns_topic_arn],
+            AlarmDescription=f"Any EMR metric alarm for cluster {cluster_id}",
+        )
+        cloudwatch.disable_alarm_actions(AlarmNames=alarm_names)
+        logger.info(f"Composite alarm '{composite_name}' set over {len(alarm_names)} metric alarms for EMR cluster "
+                    f"'{cluster_id}': {len(alarm_names) + 1} alarms, 1 notifying.")
+    except Exception as e:
+        logger.error(f"Error setting up composite alarm for EMR cluster '{cluster_id}': {e}")
+
+def get_instance_group_mapping(cluster_id, quiet=False):
     """Fetches instance group IDs and their types (MASTER, CORE, TASK) for the given EMR cluster."""
     group_mapping = {}
     try:
         response = emr.list_instance_groups(ClusterId=cluster_id)
         for group in response['InstanceGroups']:
             group_mapping[group['Id']] = group['InstanceGroupType']
-        logger.info(f"Fetched instance group mapping for cluster '{cluster_id}': {group_mapping}")
+        if not quiet:
+            logger.info(f"Fetched instance group mapping for cluster '{cluster_id}': {group_mapping}")
     except Exception as e:
         logger.error(f"Error fetching instance group mapping for cluster '{cluster_id}': {e}")
     return group_mapping
 
-def get_cluster_instance_ids(cluster_id):
-    """Fetches all instance IDs in the EMR cluster with their associated node types."""
-    instance_group_mapping = get_instance_group_mapping(cluster_id)
+def get_cluster_instance_ids(cluster_id, quiet=False):
+    """
+    Fetches the live (not yet terminated) instance IDs in the EMR cluster with
+    their associated node types. quiet skips the success logging, for callers
+    that refresh the list repeatedly.
+    """
+    instance_group_mapping = get_instance_group_mapping(cluster_id, quiet)
     instances = []
 
     try:
-        response = emr.list_instances(ClusterId=cluster_id)
-        for instance in response['Instances']:
-            instance_id = instance['Ec2InstanceId']
-            instance_group_id = instance['InstanceGroupId']
-            node_type = instance_group_mapping.get(instance_group_id, 'UNKNOWN')
-            instances.append({'InstanceId': instance_id, 'NodeType': node_type})
+        paginator = emr.get_paginator('list_instances')
+        for page in paginator.paginate(ClusterId=cluster_id, InstanceStates=LIVE_INSTANCE_STATES):
+            for instance in page['Instances']:
+                instance_id = instance['Ec2InstanceId']
+                instance_group_id = instance.get('InstanceGroupId')
+                node_type = instance_group_mapping.get(instance_group_id, 'UNKNOWN')
+                instances.append({'InstanceId': instance_id, 'NodeType': node_type})
         if instances:
-            logger.info(f"Fetched instance IDs and node types for cluster '{cluster_id}': {instances}")
+            if not quiet:
+                logger.info(f"Fetched instance IDs and node types for cluster '{cluster_id}': {instances}")
         else:
             logger.warning(f"No instance IDs found for cluster '{cluster_id}'. Ensure the cluster is running and has active nodes.")
     except Exception as e:
@@ -160,3 +223,136 @@ def save_cluster_report_to_csv(cluster_metrics, file_name='Complete_Cluster_Repo
         logger.error(f"Failed to save the report to CSV: {e}")
 
 
+
+
+WATCH_METRICS = ['CPUUtilization', 'NetworkIn', 'NetworkOut']
+WATCH_HISTORY = 60  # datapoints kept per series
+WATCH_NODE_REFRESH = 10  # re-list cluster nodes every N polls
+MAX_METRIC_DATA_QUERIES = 500  # GetMetricData limit per request
+SPARK_CHARS = '▁▂▃▄▅▆▇█'
+
+
+class SeriesRing:
+    """Fixed-size ring buffer of the newest datapoints of one metric series."""
+
+    def __init__(self, size=WATCH_HISTORY):
+        self.values = np.full(size, np.nan)
+        self.next = 0
+        self.last_timestamp = None
+
+    def push(self, timestamp, value):
+        # Overlapping poll windows return points we already hold
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return
+        self.values[self.next] = value
+        self.next = (self.next + 1) % len(self.values)
+        self.last_timestamp = timestamp
+
+    def ordered(self):
+        return np.roll(self.values, -self.next)
+
+    def latest(self):
+        return self.values[self.next - 1]
+
+
+def sparkline(values, ceiling=None):
+    """Renders the values as a row of block characters, blank where data is missing."""
+    known = values[~np.isnan(values)]
+    if not len(known):
+        return ' ' * len(values)
+    ceiling = ceiling or known.max() or 1
+    levels = np.clip(np.nan_to_num(values / ceiling) * (len(SPARK_CHARS) - 1), 0, len(SPARK_CHARS) - 1).astype(int)
+    return ''.join(' ' if np.isnan(v) else SPARK_CHARS[level] for v, level in zip(values, levels))
+
+
+def poll_latest_datapoints(instances, period, lookback_periods=3):
+    """
+    Fetches the newest few periods of every watched metric for every node with
+    batched GetMetricData calls. Returns {(instance id, metric): [(timestamp, value)]}.
+    """
+    queries = [
+        {
+            'Id': f"m{i}_{j}",
+            'MetricStat': {
+                'Metric': {
+                    'Namespace': 'AWS/EC2',
+                    'MetricName': metric_name,
+                    'Dimensions': [{'Name': 'InstanceId', 'Value': instance['InstanceId']}],
+                },
+                'Period': period,
+                'Stat': 'Average',
+            },
+        }
+        for i, instance in enumerate(instances)
+        for j, metric_name in enumerate(WATCH_METRICS)
+    ]
+    end_time = datetime.datetime.now(datetime.timezone.utc)
+    start_time = end_time - datetime.timedelta(seconds=period * lookback_periods)
+    points = {}
+    for offset in range(0, len(queries), MAX_METRIC_DATA_QUERIES):
+        paginator = cloudwatch.get_paginator('get_metric_data')
+        for page in paginator.paginate(MetricDataQueries=queries[offset:offset + MAX_METRIC_DATA_QUERIES],
+                                       StartTime=start_time, EndTime=end_time, ScanBy='TimestampAscending'):
+            for result in page['MetricDataResults']:
+                i, j = (int(n) for n in result['Id'][1:].split('_'))
+                key = (instances[i]['InstanceId'], WATCH_METRICS[j])
+                points.setdefault(key, []).extend(zip(result['Timestamps'], result['Values']))
+    return points
+
+
+def render_dashboard(cluster_id, instances, rings, period):
+    lines = [f"EMR cluster {cluster_id} - {len(instances)} nodes - {period}s datapoints - "
+             f"{datetime.datetime.now().strftime('%H:%M:%S')} (Ctrl+C to stop)", '']
+    lines.append(f"{'Instance':<20} {'Type':<7} {'CPU%':>6}  {'CPU':<{WATCH_HISTORY}}  {'Net MB in/out':>15}  Network")
+    for instance in instances:
+        cpu, net_in, net_out = (rings[(instance['InstanceId'], m)] for m in WATCH_METRICS)
+        net = np.nansum(np.vstack([net_in.ordered(), net_out.ordered()]), axis=0)
+        net[np.isnan(net_in.ordered()) & np.isnan(net_out.ordered())] = np.nan
+        cpu_now = cpu.latest()
+        lines.append(
+            f"{instance['InstanceId']:<20} {instance['NodeType']:<7} "
+            f"{'-' if np.isnan(cpu_now) else f'{cpu_now:.1f}':>6}  {sparkline(cpu.ordered(), 100)}  "
+            f"{np.nan_to_num(net_in.latest()) / 1e6:>7.1f}/{np.nan_to_num(net_out.latest()) / 1e6:<7.1f}  "
+            f"{sparkline(net)}"
+        )
+    return '\n'.join(lines)
+
+
+def watch_cluster(cluster_id, interval=60, period=60, duration=None):
+    """
+    Live terminal view of a cluster's nodes. Each poll fetches only the newest
+    datapoints and appends them to a fixed-size ring per series, so memory
+    stays flat however long it runs. Use period=300 without detailed monitoring.
+    """
+    instances, rings = [], {}
+    polls = 0
+    deadline = time.time() + duration if duration else None
+    logger.info(f"Watching EMR cluster '{cluster_id}' every {interval}s (Ctrl+C to stop).")
+    try:
+        while not deadline or time.time() < deadline:
+            if polls % WATCH_NODE_REFRESH == 0:
+                # Logging inside the redraw loop would scroll the dashboard away
+                instances = get_cluster_instance_ids(cluster_id, quiet=True)
+                if not instances:
+                    return
+                # Rings of nodes that left the cluster are dropped
+                rings = {
+                    (instance['InstanceId'], metric_name): rings.get((instance['InstanceId'], metric_name)) or SeriesRing()
+                    for instance in instances
+                    for metric_name in WATCH_METRICS
+                }
+            polls += 1
+
+            try:
+                for key, points in poll_latest_datapoints(instances, period).items():
+                    for timestamp, value in points:
+                        rings[key].push(timestamp, value)
+            except Exception as e:
+                logger.error(f"Error polling metrics for EMR cluster '{cluster_id}': {e}")
+
+            print('\033[H\033[J' + render_dashboard(cluster_id, instances, rings, period), flush=True)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info(f"Stopped watching EMR cluster '{cluster_id}' after {polls} polls.")
@@ -0,0 +1,217 @@
+# boto3/emr/pool_simulator.py
+import csv
+import heapq
+import itertools
+import logging
+import random
+
+from emr.costs import hourly_price
+from emr.warm_pool import WarmPool, default_template
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BOOTSTRAP_SECONDS = 600  # cold start, from the 8-12 minutes clusters take
+DEFAULT_RESIZE_SECONDS = 240
+DEFAULT_SHRINK_SECONDS = 120
+DEFAULT_TICK = 30
+
+
+class _Paginator:
+    def __init__(self, method):
+        self.method = method
+
+    def paginate(self, **kwargs):
+        yield self.method(**kwargs)
+
+
+class SimulatedEMR:
+    """
+    Stand-in for the EMR client with the calls WarmPool makes, on a virtual
+    clock. Clusters take bootstrap_seconds to reach WAITING and TASK groups
+    take resize_seconds to grow; running nodes accrue node-seconds for costing.
+    """
+
+    def __init__(self, bootstrap_seconds=DEFAULT_BOOTSTRAP_SECONDS, resize_seconds=DEFAULT_RESIZE_SECONDS,
+                 shrink_seconds=DEFAULT_SHRINK_SECONDS):
+        self.bootstrap_seconds = bootstrap_seconds
+        self.resize_seconds = resize_seconds
+        self.shrink_seconds = shrink_seconds
+        self.now = 0.0
+        self.clusters = {}
+        self.events = []  # (time, sequence, callback)
+        self.sequence = itertools.count()
+        self.node_seconds = 0.0
+        self.launched = 0
+
+    def clock(self):
+        return self.now
+
+    def _at(self, when, callback):
+        heapq.heappush(self.events, (when, next(self.sequence), callback))
+
+    def _running_nodes(self):
+        return sum(g['Running'] for c in self.clusters.values() if c['State'] != 'TERMINATED' for g in c['Groups'].values())
+
+    def advance(self, until):
+        """Moves the clock forward, applying state changes and accruing node time in order."""
+        while self.events and self.events[0][0] <= until:
+            when, _, callback = heapq.heappop(self.events)
+            self.node_seconds += self._running_nodes() * (when - self.now)
+            self.now = when
+            callback()
+        self.node_seconds += self._running_nodes() * (until - self.now)
+        self.now = until
+
+    # --- EMR API subset ---
+
+    def get_paginator(self, operation_name):
+        return _Paginator(getattr(self, operation_name))
+
+    def run_job_flow(self, Name, Instances, Tags=(), **kwargs):
+        cluster_id = f"j-SIM{next(self.sequence):08d}"
+        groups = {}
+        for n, group in enumerate(Instances['InstanceGroups']):
+            groups[f"ig-{cluster_id}-{n}"] = {
+                'Type': group['InstanceRole'],
+                'Requested': group['InstanceCount'],
+                # Instances bill from launch, while the cluster bootstraps
+                'Running': group['InstanceCount'],
+                'State': 'PROVISIONING',
+            }
+        cluster = {'Name': Name, 'State': 'STARTING', 'Tags': {t['Key']: t['Value'] for t in Tags}, 'Groups': groups}
+        self.clusters[cluster_id] = cluster
+        self.launched += 1
+
+        def ready():
+            if cluster['State'] == 'STARTING':
+                cluster['State'] = 'WAITING'
+                for group in groups.values():
+                    group['State'] = 'RUNNING'
+        self._at(self.now + self.bootstrap_seconds, ready)
+        return {'JobFlowId': cluster_id}
+
+    def list_clusters(self, ClusterStates, Marker=None):
+        return {'Clusters': [{'Id': cluster_id, 'Name': c['Name'], 'Status': {'State': c['State']}}
+                             for cluster_id, c in self.clusters.items() if c['State'] in ClusterStates]}
+
+    def describe_cluster(self, ClusterId):
+        cluster = self.clusters[ClusterId]
+        return {'Cluster': {
+            'Id': ClusterId,
+            'Name': cluster['Name'],
+            'Status': {'State': cluster['State']},
+            'Tags': [{'Key': k, 'Value': v} for k, v in cluster['Tags'].items()],
+        }}
+
+    def list_instance_groups(self, ClusterId):
+        return {'InstanceGroups': [
+            {'Id': group_id, 'InstanceGroupType': g['Type'], 'RequestedInstanceCount': g['Requested'],
+             'RunningInstanceCount': g['Running'], 'Status': {'State': g['State']}}
+            for group_id, g in self.clusters[ClusterId]['Groups'].items()
+        ]}
+
+    def modify_instance_groups(self, InstanceGroups, ClusterId=None):
+        for change in InstanceGroups:
+            group = self.clusters[ClusterId]['Groups'][change['InstanceGroupId']]
+            growing = change['InstanceCount'] > group['Running']
+            group['Requested'] = change['InstanceCount']
+            group['State'] = 'RESIZING'
+
+            def resized(group=group, count=change['InstanceCount']):
+                if group['Requested'] == count:
+                    group['Running'] = count
+                    group['State'] = 'RUNNING'
+            self._at(self.now + (self.resize_seconds if growing else self.shrink_seconds), resized)
+
+    def add_tags(self, ResourceId, Tags):
+        self.clusters[ResourceId]['Tags'].update({t['Key']: t['Value'] for t in Tags})
+
+    def remove_tags(self, ResourceId, TagKeys):
+        for key in TagKeys:
+            self.clusters[ResourceId]['Tags'].pop(key, None)
+
+    def add_job_flow_steps(self, JobFlowId, Steps):
+        return {'StepIds': [f"s-SIM{next(self.sequence):08d}" for _ in Steps]}
+
+    def terminate_job_flows(self, JobFlowIds):
+        for cluster_id in JobFlowIds:
+            self.clusters[cluster_id]['State'] = 'TERMINATED'
+
+
+def load_trace(path):
+    """Job arrivals from a CSV with arrival_seconds, task_nodes and duration_seconds columns."""
+    with open(path, newline='') as f:
+        return sorted(
+            (float(row['arrival_seconds']), int(row['task_nodes']), float(row['duration_seconds']))
+            for row in csv.DictReader(f)
+        )
+
+
+def synthetic_trace(jobs=100, mean_interarrival=900, max_task_nodes=8, seed=0):
+    """Poisson arrivals with 5 to 60 minute jobs of 0 to max_task_nodes extra nodes."""
+    rng = random.Random(seed)
+    arrival, trace = 0.0, []
+    for _ in range(jobs):
+        arrival += rng.expovariate(1 / mean_interarrival)
+        trace.append((round(arrival), rng.randint(0, max_task_nodes), rng.uniform(300, 3600)))
+    return trace
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0
+
+
+def simulate_pool(trace, size, idle_ttl=1800, max_clusters=10, template=None, instance_type='m5.xlarge',
+                  tick=DEFAULT_TICK, **emr_options):
+    """
+    Replays a job-arrival trace against a WarmPool of the given size on a
+    SimulatedEMR, polling once per tick the way a submitter would. Returns
+    queue-wait statistics and the pool's node-hours and cost.
+    """
+    emr = SimulatedEMR(**emr_options)
+    pool = WarmPool('sim', size=size, template=template or default_template(instance_type), idle_ttl=idle_ttl,
+                    max_clusters=max_clusters, emr=emr, clock=emr.clock)
+    pool.replenish()
+
+    jobs = [{'Id': f"job-{n}", 'Arrival': a, 'TaskNodes': nodes, 'Duration': d, 'State': 'pending'}
+            for n, (a, nodes, d) in enumerate(trace)]
+    now = 0.0
+    while any(job['State'] != 'done' for job in jobs):
+        now += tick
+        emr.advance(now)
+        for job in jobs:
+            if job['State'] == 'running' and now >= job['End']:
+                pool.release(job['Cluster'])
+                job['State'] = 'done'
+            elif job['State'] == 'resizing' and pool.is_ready(job['Cluster']):
+                job['Start'], job['End'] = now, now + job['Duration']
+                job['State'] = 'running'
+            elif job['State'] == 'pending' and job['Arrival'] <= now:
+                job['State'] = 'queued'
+        for job in jobs:
+            if job['State'] == 'queued':
+                cluster_id = pool.lease(job['Id'], job['TaskNodes'])
+                if cluster_id:
+                    job['Cluster'], job['State'] = cluster_id, 'resizing'
+        pool.reap()
+        pool.replenish()
+
+    waits = [job['Start'] - job['Arrival'] for job in jobs]
+    node_hours = emr.node_seconds / 3600
+    return {
+        'PoolSize': size,
+        'Jobs': len(jobs),
+        'MeanWaitMinutes': round(sum(waits) / len(waits) / 60, 1) if waits else 0,
+        'P95WaitMinutes': round(_percentile(waits, 0.95) / 60, 1),
+        'MaxWaitMinutes': round(max(waits, default=0) / 60, 1),
+        'ClustersLaunched': emr.launched,
+        'NodeHours': round(node_hours, 1),
+        'Cost': round(node_hours * hourly_price(instance_type), 2),
+        'Hours': round(now / 3600, 1),
+    }
+
+
+def compare_pool_sizes(trace, sizes=(0, 1, 2, 4), **options):
+    """Runs the same trace for each pool size so queue wait can be weighed against cost."""
+    return [simulate_pool(trace, size, **options) for size in sizes]
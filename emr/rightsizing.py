@@ -0,0 +1,273 @@
+# boto3/emr/rightsizing.py
+import boto3
+import datetime
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from botocore.config import Config
+
+logger = logging.getLogger(__name__)
+cloudwatch = boto3.client('cloudwatch', config=Config(max_pool_connections=32))
+ec2 = boto3.client('ec2')
+emr = boto3.client('emr')
+
+PERIOD = 300  # 5-minute datapoints, as in fetch_ec2_instance_metrics
+SERIES_PER_REQUEST = 10  # 10 x 30 days of 5-minute points stays under GetMetricData's 100,800-point page
+TARGET_P95_CPU = 60.0  # size so p95 CPU lands here...
+PEAK_P99_CPU = 90.0  # ...and p99 stays below this
+PEAK_P99_MEMORY = 80.0  # memory cannot burst, so size p99 memory under this
+MIN_COVERAGE = 0.25  # share of the window's 5-minute slots with data, about a week of 30 days
+MEMORY_NAMESPACE = 'CWAgent'  # the CloudWatch agent's default namespace
+MEMORY_METRIC = 'mem_used_percent'
+
+# Approximate us-east-1 on-demand prices; edit to match your region and contracts
+INSTANCE_TYPES = {
+    't3.medium': (2, 4, 0.0416), 't3.large': (2, 8, 0.0832), 't3.xlarge': (4, 16, 0.1664), 't3.2xlarge': (8, 32, 0.3328),
+    'm5.large': (2, 8, 0.096), 'm5.xlarge': (4, 16, 0.192), 'm5.2xlarge': (8, 32, 0.384),
+    'm5.4xlarge': (16, 64, 0.768), 'm5.8xlarge': (32, 128, 1.536), 'm5.12xlarge': (48, 192, 2.304),
+    'c5.large': (2, 4, 0.085), 'c5.xlarge': (4, 8, 0.17), 'c5.2xlarge': (8, 16, 0.34),
+    'c5.4xlarge': (16, 32, 0.68), 'c5.9xlarge': (36, 72, 1.53), 'c5.18xlarge': (72, 144, 3.06),
+    'r5.large': (2, 16, 0.126), 'r5.xlarge': (4, 32, 0.252), 'r5.2xlarge': (8, 64, 0.504),
+    'r5.4xlarge': (16, 128, 1.008), 'r5.8xlarge': (32, 256, 2.016), 'r5.12xlarge': (48, 384, 3.024),
+}
+
+
+def instance_type_table():
+    """The price table as a DataFrame with family, vCPUs, memory and hourly price."""
+    table = pd.DataFrame(
+        [(name, name.split('.')[0], vcpus, memory, price) for name, (vcpus, memory, price) in INSTANCE_TYPES.items()],
+        columns=['InstanceType', 'Family', 'VCPUs', 'MemoryGiB', 'HourlyPrice'],
+    )
+    return table.sort_values(['Family', 'VCPUs']).reset_index(drop=True)
+
+
+def list_fleet_instances(cluster_ids=()):
+    """
+    Returns a DataFrame of running EC2 instances with their type, tagged with
+    the EMR cluster and node type for nodes of the given clusters.
+    """
+    rows = {}
+    for page in ec2.get_paginator('describe_instances').paginate(
+            Filters=[{'Name': 'instance-state-name', 'Values': ['running']}]):
+        for reservation in page['Reservations']:
+            for instance in reservation['Instances']:
+                rows[instance['InstanceId']] = {
+                    'InstanceId': instance['InstanceId'],
+                    'InstanceType': instance['InstanceType'],
+                    'ClusterId': None,
+                    'NodeType': 'EC2',
+                }
+
+    for cluster_id in cluster_ids:
+        groups = {g['Id']: g['InstanceGroupType'] for g in emr.list_instance_groups(ClusterId=cluster_id)['InstanceGroups']}
+        for page in emr.get_paginator('list_instances').paginate(ClusterId=cluster_id, InstanceStates=['RUNNING']):
+            for instance in page['Instances']:
+                rows[instance['Ec2InstanceId']] = {
+                    'InstanceId': instance['Ec2InstanceId'],
+                    'InstanceType': instance['InstanceType'],
+                    'ClusterId': cluster_id,
+                    'NodeType': groups.get(instance.get('InstanceGroupId'), 'UNKNOWN'),
+                }
+    return pd.DataFrame(list(rows.values()), columns=['InstanceId', 'InstanceType', 'ClusterId', 'NodeType'])
+
+
+def list_memory_dimensions(instance_ids):
+    """
+    Finds the CloudWatch agent memory series of the given instances. The agent
+    appends dimensions such as ImageId and InstanceType as configured, so the
+    exact dimension set is looked up. Returns {instance id: dimensions}.
+    """
+    wanted = set(instance_ids)
+    dimensions = {}
+    for page in cloudwatch.get_paginator('list_metrics').paginate(Namespace=MEMORY_NAMESPACE, MetricName=MEMORY_METRIC):
+        for metric in page['Metrics']:
+            instance_id = next((d['Value'] for d in metric['Dimensions'] if d['Name'] == 'InstanceId'), None)
+            if instance_id in wanted:
+                dimensions.setdefault(instance_id, metric['Dimensions'])
+    return dimensions
+
+
+def fetch_utilization_matrix(instance_ids, days=30, metric_name='CPUUtilization', namespace='AWS/EC2', dimensions=None):
+    """
+    Fetches days of 5-minute averages for every instance with batched
+    GetMetricData calls and returns a (instances x time slots) float32 matrix,
+    NaN where no datapoint exists. dimensions maps instance IDs to their
+    metric dimensions; instances missing from it get an all-NaN row.
+    """
+    end_time = datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
+    end_time -= datetime.timedelta(minutes=end_time.minute % 5)
+    start_time = end_time - datetime.timedelta(days=days)
+    slots = int((end_time - start_time).total_seconds() // PERIOD)
+    matrix = np.full((len(instance_ids), slots), np.nan, dtype=np.float32)
+    start_ts = start_time.timestamp()
+
+    if dimensions is None:
+        dimensions = {instance_id: [{'Name': 'InstanceId', 'Value': instance_id}] for instance_id in instance_ids}
+    rows = [n for n, instance_id in enumerate(instance_ids) if instance_id in dimensions]
+
+    def fetch(offset):
+        queries = [
+            {
+                'Id': f"i{row}",
+                'MetricStat': {
+                    'Metric': {
+                        'Namespace': namespace,
+                        'MetricName': metric_name,
+                        'Dimensions': dimensions[instance_ids[row]],
+                    },
+                    'Period': PERIOD,
+                    'Stat': 'Average',
+                },
+            }
+            for row in rows[offset:offset + SERIES_PER_REQUEST]
+        ]
+        for page in cloudwatch.get_paginator('get_metric_data').paginate(
+                MetricDataQueries=queries, StartTime=start_time, EndTime=end_time):
+            for result in page['MetricDataResults']:
+                if not result['Values']:
+                    continue
+                row = int(result['Id'][1:])
+                columns = ((np.array([t.timestamp() for t in result['Timestamps']]) - start_ts) // PERIOD).astype(int)
+                valid = (columns >= 0) & (columns < slots)
+                matrix[row, columns[valid]] = np.asarray(result['Values'], dtype=np.float32)[valid]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(fetch, range(0, len(rows), SERIES_PER_REQUEST)))
+    logger.info(f"Fetched {metric_name} for {len(rows)} instances over {days} days.")
+    return matrix
+
+
+def utilization_profiles(matrix, percentiles=(50, 95, 99)):
+    """
+    Per-row percentile profile of a utilization matrix, fully vectorized: each
+    row is sorted once (NaNs sort last) and percentiles are read by index.
+    Coverage is the share of time slots that have a datapoint.
+    """
+    counts = np.count_nonzero(~np.isnan(matrix), axis=1)
+    ordered = np.sort(matrix, axis=1)
+    rows = np.arange(matrix.shape[0])
+    last = np.maximum(counts - 1, 0)
+
+    profile = {'Datapoints': counts, 'Coverage': counts / matrix.shape[1] if matrix.shape[1] else np.zeros(len(counts))}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        profile['Mean'] = np.nansum(matrix, axis=1, dtype=np.float64) / counts
+    for p in percentiles:
+        values = ordered[rows, np.floor(last * p / 100).astype(int)].astype(np.float64)
+        values[counts == 0] = np.nan
+        profile[f"P{p}"] = values
+    maximum = ordered[rows, last].astype(np.float64)
+    maximum[counts == 0] = np.nan
+    profile['Max'] = maximum
+    return pd.DataFrame(profile)
+
+
+def recommend_instance_types(fleet, profiles, min_coverage=MIN_COVERAGE, memory_profiles=None):
+    """
+    Matches each instance's CPU profile to the cheapest type in its family that
+    keeps p95 near TARGET_P95_CPU and p99 under PEAK_P99_CPU, and, where memory
+    profiles exist, p99 memory under PEAK_P99_MEMORY. Vectorized per family
+    with searchsorted over the sorted vCPU and memory sizes.
+    """
+    table = instance_type_table()
+    result = pd.concat([fleet.reset_index(drop=True), profiles.reset_index(drop=True)], axis=1)
+    if memory_profiles is not None:
+        memory = memory_profiles.reset_index(drop=True)[['Coverage', 'P95', 'P99', 'Max']]
+        result = pd.concat([result, memory.add_prefix('Memory')], axis=1)
+    else:
+        result['MemoryP99'] = np.nan
+    current = table.set_index('InstanceType').reindex(result['InstanceType'])
+    result['Family'] = result['InstanceType'].str.split('.').str[0]
+    result['VCPUs'] = current['VCPUs'].to_numpy()
+    result['MemoryGiB'] = current['MemoryGiB'].to_numpy()
+    result['HourlyPrice'] = current['HourlyPrice'].to_numpy()
+
+    # vCPUs and memory the observed load needs at the target utilization
+    needed = result['VCPUs'] * np.maximum(result['P95'] / TARGET_P95_CPU, result['P99'] / PEAK_P99_CPU)
+    needed_memory = (result['MemoryGiB'] * result['MemoryP99'] / PEAK_P99_MEMORY).to_numpy()
+    result['RequiredVCPUs'] = needed
+    result['RequiredMemoryGiB'] = needed_memory
+    result['RecommendedType'] = None
+    result['RecommendedHourlyPrice'] = np.nan
+
+    for family, sizes in table.groupby('Family'):
+        mask = (result['Family'] == family).to_numpy() & ~np.isnan(needed.to_numpy())
+        if not mask.any():
+            continue
+        vcpus = sizes['VCPUs'].to_numpy()
+        positions = np.searchsorted(vcpus, needed.to_numpy()[mask], side='left')
+        # Memory grows with size within a family; instances without memory data are sized on CPU alone
+        memory_positions = np.searchsorted(sizes['MemoryGiB'].to_numpy(), np.nan_to_num(needed_memory[mask]), side='left')
+        positions = np.minimum(np.maximum(positions, memory_positions), len(vcpus) - 1)
+        result.loc[mask, 'RecommendedType'] = sizes['InstanceType'].to_numpy()[positions]
+        result.loc[mask, 'RecommendedHourlyPrice'] = sizes['HourlyPrice'].to_numpy()[positions]
+
+    action = np.where(result['RecommendedHourlyPrice'] < result['HourlyPrice'], 'downsize',
+                      np.where(result['RecommendedHourlyPrice'] > result['HourlyPrice'], 'upsize', 'keep'))
+    action = np.where(result['RecommendedType'].isna(), 'unknown type', action)
+    action = np.where(result['Coverage'] < min_coverage, 'insufficient data', action)
+    result['Action'] = action
+    result['MonthlySavings'] = np.where(
+        np.isin(action, ['downsize', 'upsize']),
+        (result['HourlyPrice'] - result['RecommendedHourlyPrice']) * 730, 0.0
+    ).round(2)
+    return result
+
+
+def recommend_emr_node_mix(recommendations):
+    """
+    Per EMR cluster, the CORE and TASK node counts that would carry the observed
+    p95 CPU at TARGET_P95_CPU. Spare capacity usually belongs on TASK nodes,
+    which can be scaled without touching HDFS.
+    """
+    nodes = recommendations[recommendations['NodeType'].isin(['CORE', 'TASK'])]
+    rows = []
+    for cluster_id, cluster in nodes.groupby('ClusterId'):
+        row = {'ClusterId': cluster_id}
+        for node_type in ('CORE', 'TASK'):
+            group = cluster[cluster['NodeType'] == node_type]
+            p95 = group['P95'].mean() if len(group) else np.nan
+            row[f"{node_type.title()}Nodes"] = len(group)
+            row[f"{node_type.title()}P95CPU"] = round(p95, 1) if len(group) else None
+            row[f"Recommended{node_type.title()}Nodes"] = (
+                max(1, math.ceil(len(group) * p95 / TARGET_P95_CPU)) if len(group) and not np.isnan(p95) else len(group)
+            )
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def run_rightsizing(cluster_ids=(), days=30):
+    """Collects utilization for the fleet and returns (per-instance recommendations, EMR node mix)."""
+    fleet = list_fleet_instances(cluster_ids)
+    if fleet.empty:
+        logger.error("No running instances found.")
+        return pd.DataFrame(), pd.DataFrame()
+    instance_ids = fleet['InstanceId'].tolist()
+    profiles = utilization_profiles(fetch_utilization_matrix(instance_ids, days))
+    memory_dimensions = list_memory_dimensions(instance_ids)
+    memory_profiles = None
+    if memory_dimensions:
+        memory_profiles = utilization_profiles(fetch_utilization_matrix(
+            instance_ids, days, MEMORY_METRIC, MEMORY_NAMESPACE, memory_dimensions))
+    logger.info(f"Memory metrics found for {len(memory_dimensions)} of {len(instance_ids)} instances.")
+    recommendations = recommend_instance_types(fleet, profiles, memory_profiles=memory_profiles)
+    return recommendations, recommend_emr_node_mix(recommendations)
+
+
+def save_rightsizing_report_to_csv(recommendations, node_mix, file_name='Rightsizing_Report.csv'):
+    if recommendations.empty:
+        logger.error("No data available to write to the rightsizing report.")
+        return
+    try:
+        file_path = os.path.join(os.getcwd(), file_name)
+        recommendations.to_csv(file_path, index=False)
+        logger.info(f"Rightsizing report saved at: {file_path}")
+        if not node_mix.empty:
+            mix_path = os.path.join(os.getcwd(), 'EMR_Node_Mix_Report.csv')
+            node_mix.to_csv(mix_path, index=False)
+            logger.info(f"EMR node mix report saved at: {mix_path}")
+    except Exception as e:
+        logger.error(f"Failed to save the rightsizing report to CSV: {e}")
@@ -0,0 +1,220 @@
+# boto3/emr/warm_pool.py
+import boto3
+import datetime
+import logging
+import time
+
+from emr.cluster_operations import LOG_URI
+from reaper.reaper import EXEMPT_TAG
+
+logger = logging.getLogger(__name__)
+
+POOL_TAG = 'warm-pool'
+LEASE_TAG = 'warm-pool:lease'
+IDLE_SINCE_TAG = 'warm-pool:idle-since'
+ACTIVE_STATES = ['STARTING', 'BOOTSTRAPPING', 'RUNNING', 'WAITING']
+# Instance group states a leased cluster does not recover from on its own
+FAILED_GROUP_STATES = ['SUSPENDED', 'ARRESTED', 'TERMINATING', 'TERMINATED', 'SHUTTING_DOWN', 'ENDED']
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_CLUSTERS = 10
+DEFAULT_IDLE_TTL = 1800  # seconds a surplus cluster may sit free before it is terminated
+TERMINATE_BATCH = 10
+
+
+def default_template(instance_type='m5.xlarge', core_nodes=2, release_label='emr-6.3.0'):
+    """
+    run_job_flow arguments for pool clusters: the create_cluster layout plus
+    an empty TASK group. Leases grow and shrink the TASK group only, so HDFS
+    on the CORE nodes is never decommissioned.
+    """
+    return {
+        'ReleaseLabel': release_label,
+        'Instances': {
+            'InstanceGroups': [
+                {'Name': 'Master nodes', 'Market': 'ON_DEMAND', 'InstanceRole': 'MASTER',
+                 'InstanceType': instance_type, 'InstanceCount': 1},
+                {'Name': 'Core nodes', 'Market': 'ON_DEMAND', 'InstanceRole': 'CORE',
+                 'InstanceType': instance_type, 'InstanceCount': core_nodes},
+                {'Name': 'Task nodes', 'Market': 'ON_DEMAND', 'InstanceRole': 'TASK',
+                 'InstanceType': instance_type, 'InstanceCount': 0},
+            ],
+            'Ec2KeyName': 'test',
+            'KeepJobFlowAliveWhenNoSteps': True,
+            'TerminationProtected': False,
+        },
+        'Applications': [{'Name': 'Hadoop'}, {'Name': 'Spark'}],
+        'LogUri': LOG_URI,
+        'ServiceRole': 'EMR_DefaultRole',
+        'JobFlowRole': 'EMR_EC2_DefaultRole',
+        'VisibleToAllUsers': True,
+    }
+
+
+def spark_step(script_uri, args=(), name='PySpark job'):
+    """An add_job_flow_steps entry running a PySpark script such as emr/pyspark.py from S3."""
+    return {
+        'Name': name,
+        'ActionOnFailure': 'CONTINUE',  # a failed job must not take the pooled cluster down
+        'HadoopJarStep': {'Jar': 'command-runner.jar', 'Args': ['spark-submit', script_uri, *args]},
+    }
+
+
+class WarmPool:
+    """
+    Keeps `size` free clusters of a template ready in WAITING. All pool state
+    lives in cluster tags, so any process can lease or release; a lease is
+    read back after it is written, so concurrent jobs racing for the same
+    cluster do not both take it. Pool clusters carry the
+    idle reaper exemption tag, since waiting idle is their job.
+    """
+
+    def __init__(self, name, size=DEFAULT_POOL_SIZE, template=None, idle_ttl=DEFAULT_IDLE_TTL,
+                 max_clusters=DEFAULT_MAX_CLUSTERS, emr=None, clock=time.time):
+        self.name = name
+        self.size = size
+        self.template = template or default_template()
+        self.idle_ttl = idle_ttl
+        self.max_clusters = max_clusters
+        self.emr = emr or boto3.client('emr')
+        self.clock = clock
+
+    @property
+    def cluster_name(self):
+        return f"{self.name}-warm"
+
+    def clusters(self):
+        """
+        Active clusters of this pool with their lease and idle time. Only
+        clusters carrying the pool's name are described, so polling costs one
+        call per pool cluster rather than per cluster in the account.
+        """
+        pool = []
+        for page in self.emr.get_paginator('list_clusters').paginate(ClusterStates=ACTIVE_STATES):
+            for summary in page['Clusters']:
+                if summary['Name'] != self.cluster_name:
+                    continue
+                cluster = self.emr.describe_cluster(ClusterId=summary['Id'])['Cluster']
+                tags = {t['Key']: t['Value'] for t in cluster.get('Tags', [])}
+                if tags.get(POOL_TAG) != self.name:
+                    continue
+                pool.append({
+                    'Id': summary['Id'],
+                    'State': cluster['Status']['State'],
+                    'Lease': tags.get(LEASE_TAG) or None,
+                    'IdleSince': float(tags.get(IDLE_SINCE_TAG, 0)),
+                })
+        return pool
+
+    def _launch(self, job_id=None):
+        tags = [{'Key': POOL_TAG, 'Value': self.name},
+                {'Key': IDLE_SINCE_TAG, 'Value': str(int(self.clock()))},
+                {'Key': EXEMPT_TAG, 'Value': 'warm-pool'}]
+        if job_id:
+            tags.append({'Key': LEASE_TAG, 'Value': job_id})
+        response = self.emr.run_job_flow(Name=self.cluster_name, Tags=tags, **self.template)
+        logger.info(f"Warm pool '{self.name}' launched cluster '{response['JobFlowId']}'"
+                    + (f" for '{job_id}'." if job_id else "."))
+        return response['JobFlowId']
+
+    def replenish(self, pool=None):
+        """Launches clusters until `size` are free (ready or starting), within max_clusters."""
+        pool = self.clusters() if pool is None else pool
+        free = sum(1 for c in pool if c['Lease'] is None)
+        launch = min(self.size - free, self.max_clusters - len(pool))
+        return [self._launch() for _ in range(max(0, launch))]
+
+    def _claim(self, cluster_id, job_id):
+        """
+        Tags a free cluster with the lease and reads the tag back. Tag writes
+        are last-write-wins, so a lessor racing for the same cluster may have
+        overwritten it; only the job whose ID is read back owns the cluster.
+        """
+        self.emr.add_tags(ResourceId=cluster_id, Tags=[{'Key': LEASE_TAG, 'Value': job_id}])
+        cluster = self.emr.describe_cluster(ClusterId=cluster_id)['Cluster']
+        owner = next((t['Value'] for t in cluster.get('Tags', []) if t['Key'] == LEASE_TAG), None)
+        if owner != job_id:
+            logger.info(f"Cluster '{cluster_id}' was leased to '{owner}' first. Trying another.")
+        return owner == job_id
+
+    def lease(self, job_id, task_nodes=0):
+        """
+        Leases a WAITING cluster to job_id and grows its TASK group to
+        task_nodes. Returns the cluster ID, or None while the job has to wait:
+        with no free cluster ready, one is launched already leased to the job
+        (a cold start), within max_clusters. Call again until it returns an ID.
+        """
+        pool = self.clusters()
+        cluster = next((c for c in pool if c['Lease'] == job_id), None)
+        if cluster is None:
+            # Most recently released first keeps the others aging towards the idle TTL
+            ready = sorted((c for c in pool if c['Lease'] is None and c['State'] == 'WAITING'),
+                           key=lambda c: c['IdleSince'], reverse=True)
+            cluster = next((dict(c, Lease=job_id) for c in ready if self._claim(c['Id'], job_id)), None)
+            if cluster is None:
+                if len(pool) < self.max_clusters:
+                    self._launch(job_id)
+                return None
+            pool = [cluster if c['Id'] == cluster['Id'] else c for c in pool]
+        # Keep the pool topped up behind the lease
+        self.replenish(pool)
+        if cluster['State'] != 'WAITING':
+            return None
+        groups = self.emr.list_instance_groups(ClusterId=cluster['Id'])['InstanceGroups']
+        task = next((g for g in groups if g['InstanceGroupType'] == 'TASK'), None)
+        if task and task['RequestedInstanceCount'] != task_nodes:
+            self.emr.modify_instance_groups(ClusterId=cluster['Id'], InstanceGroups=[
+                {'InstanceGroupId': task['Id'], 'InstanceCount': task_nodes}])
+        logger.info(f"Cluster '{cluster['Id']}' leased to '{job_id}' with {task_nodes} task nodes.")
+        return cluster['Id']
+
+    def is_ready(self, cluster_id):
+        """
+        True once a leased cluster's TASK group finished resizing and all its
+        requested nodes run. Raises RuntimeError if the cluster or one of its
+        groups failed, so callers stop waiting and release the lease.
+        """
+        state = self.emr.describe_cluster(ClusterId=cluster_id)['Cluster']['Status']['State']
+        if state not in ACTIVE_STATES:
+            raise RuntimeError(f"Cluster '{cluster_id}' is {state}")
+        groups = self.emr.list_instance_groups(ClusterId=cluster_id)['InstanceGroups']
+        for group in groups:
+            if group['Status']['State'] in FAILED_GROUP_STATES:
+                raise RuntimeError(f"{group['InstanceGroupType']} group of cluster '{cluster_id}' is {group['Status']['State']}")
+        return all(g['Status']['State'] == 'RUNNING' and g['RunningInstanceCount'] >= g['RequestedInstanceCount']
+                   for g in groups if g['InstanceGroupType'] == 'TASK')
+
+    def submit(self, cluster_id, step):
+        return self.emr.add_job_flow_steps(JobFlowId=cluster_id, Steps=[step])['StepIds'][0]
+
+    def release(self, cluster_id):
+        """Shrinks the TASK group back to zero and returns the cluster to the pool."""
+        groups = self.emr.list_instance_groups(ClusterId=cluster_id)['InstanceGroups']
+        for group in groups:
+            if group['InstanceGroupType'] == 'TASK' and group['RequestedInstanceCount']:
+                self.emr.modify_instance_groups(ClusterId=cluster_id, InstanceGroups=[
+                    {'InstanceGroupId': group['Id'], 'InstanceCount': 0}])
+        self.emr.remove_tags(ResourceId=cluster_id, TagKeys=[LEASE_TAG])
+        self.emr.add_tags(ResourceId=cluster_id, Tags=[{'Key': IDLE_SINCE_TAG, 'Value': str(int(self.clock()))}])
+        logger.info(f"Cluster '{cluster_id}' returned to warm pool '{self.name}'.")
+
+    def reap(self):
+        """Terminates free clusters beyond `size` that have been idle longer than idle_ttl."""
+        free = sorted((c for c in self.clusters() if c['Lease'] is None and c['State'] == 'WAITING'),
+                      key=lambda c: c['IdleSince'], reverse=True)
+        now = self.clock()
+        expired = [c['Id'] for c in free[self.size:] if now - c['IdleSince'] >= self.idle_ttl]
+        for offset in range(0, len(expired), TERMINATE_BATCH):
+            self.emr.terminate_job_flows(JobFlowIds=expired[offset:offset + TERMINATE_BATCH])
+        if expired:
+            logger.info(f"Warm pool '{self.name}' terminated {len(expired)} idle clusters.")
+        return expired
+
+    def status(self):
+        rows = self.clusters()
+        now = self.clock()
+        print(f"\n--- Warm Pool '{self.name}' (size {self.size}, max {self.max_clusters}) ---")
+        for c in rows:
+            idle = f"idle {datetime.timedelta(seconds=int(now - c['IdleSince']))}" if c['Lease'] is None else f"leased to {c['Lease']}"
+            print(f"{c['Id']}: {c['State']}, {idle}")
+        print(f"Total: {len(rows)} clusters, {sum(1 for c in rows if c['Lease'] is None)} free\n")
+        return rows
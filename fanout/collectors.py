@@ -0,0 +1,166 @@
+import logging
+import re
+import threading
+
+from botocore.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Each target runs its collectors one after another, so a client never has more than
+# one call in flight and total concurrency is the fan-out worker count. The pool is
+# sized to that, and adaptive retries absorb per-account throttling.
+CLIENT_CONFIG = Config(max_pool_connections=2, retries={'mode': 'adaptive', 'max_attempts': 10})
+# A session is shared by all regions of its account; creating clients from it is not thread-safe
+_client_lock = threading.Lock()
+
+ACTIVE_CLUSTER_STATES = ['STARTING', 'BOOTSTRAPPING', 'RUNNING', 'WAITING']
+ASG_TAG = 'aws:autoscaling:groupName'
+FLEET_CPU_PREFIX = 'FleetMaxCPU-'
+# Instance conditions in the Metrics Insights query of a tag-group fleet alarm
+FLEET_QUERY_INSTANCE = re.compile(r"InstanceId = '(i-[0-9a-f]+)'")
+
+# Alarm name prefixes created by the ec2, emr and s3 menus, and the kind of resource each one watches
+MANAGED_ALARM_PREFIXES = {
+    'HighCPUUtilization-': 'instance',
+    'InstanceStatusCheckFailed-': 'instance',
+    FLEET_CPU_PREFIX: 'fleet',
+    'EMR-': 'cluster',
+    'EMRHealth-': 'cluster',
+    'S3BucketSizeAlarm-': 'bucket',
+    'S3NumberOfObjectsAlarm-': 'bucket',
+}
+
+
+def _client(session, service, region):
+    with _client_lock:
+        return session.client(service, region_name=region, config=CLIENT_CONFIG)
+
+
+def collect_ec2_inventory(session, region):
+    """Lists every EC2 instance in the region, following pagination."""
+    ec2 = _client(session, 'ec2', region)
+    instances = []
+    for page in ec2.get_paginator('describe_instances').paginate():
+        for reservation in page['Reservations']:
+            for instance in reservation['Instances']:
+                tags = {t['Key']: t['Value'] for t in instance.get('Tags', [])}
+                instances.append({
+                    'InstanceId': instance['InstanceId'],
+                    'InstanceType': instance['InstanceType'],
+                    'State': instance['State']['Name'],
+                    'AutoScalingGroup': tags.get(ASG_TAG, ''),
+                    'PublicIpAddress': instance.get('PublicIpAddress', 'N/A'),
+                    'PrivateIpAddress': instance.get('PrivateIpAddress', 'N/A')
+                })
+    return instances
+
+
+def collect_s3_usage(session, region):
+    """Sums object sizes for every bucket located in the region."""
+    s3 = _client(session, 's3', region)
+    usage = []
+    for page in s3.get_paginator('list_buckets').paginate(BucketRegion=region):
+        for bucket in page['Buckets']:
+            total_size = 0
+            object_count = 0
+            for objects in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket['Name']):
+                for obj in objects.get('Contents', []):
+                    total_size += obj['Size']
+                    object_count += 1
+            usage.append({
+                'BucketName': bucket['Name'],
+                'ObjectCount': object_count,
+                'TotalSizeMB': round(total_size / 1024 / 1024, 2),
+            })
+    return usage
+
+
+def collect_emr_clusters(session, region):
+    """Lists active EMR clusters in the region, following pagination."""
+    emr = _client(session, 'emr', region)
+    clusters = []
+    for page in emr.get_paginator('list_clusters').paginate(ClusterStates=ACTIVE_CLUSTER_STATES):
+        for cluster in page['Clusters']:
+            clusters.append({
+                'ClusterId': cluster['Id'],
+                'Name': cluster['Name'],
+                'State': cluster['Status']['State'],
+            })
+    return clusters
+
+
+def managed_alarm_resource(alarm_name):
+    """Returns (resource kind, resource id) for an alarm created by this tool, or None."""
+    for prefix, kind in MANAGED_ALARM_PREFIXES.items():
+        if alarm_name.startswith(prefix):
+            resource_id = alarm_name[len(prefix):]
+            if kind == 'cluster':
+                # EMR-<metric>-<cluster id> or EMRHealth-<cluster id>; cluster ids look like j-XXXXXXXX
+                resource_id = 'j-' + resource_id.rsplit('j-', 1)[-1]
+            return kind, resource_id
+    return None
+
+
+def fleet_alarm_instances(alarm, instances):
+    """Instance IDs a fleet CPU alarm watches: its ASG's members, or the IDs listed in its query."""
+    group = alarm['AlarmName'][len(FLEET_CPU_PREFIX):]
+    if group.startswith('asg-'):
+        return {i['InstanceId'] for i in instances if i['AutoScalingGroup'] == group[len('asg-'):]}
+    return {
+        instance_id
+        for metric in alarm.get('Metrics', [])
+        for instance_id in FLEET_QUERY_INSTANCE.findall(metric.get('Expression', ''))
+    }
+
+
+def list_account_buckets(session, region):
+    """Names of every bucket in the account, whatever region it is located in."""
+    s3 = _client(session, 's3', region)
+    return {bucket['Name'] for page in s3.get_paginator('list_buckets').paginate() for bucket in page['Buckets']}
+
+
+def reconcile_alarms(session, region, instances, clusters):
+    """
+    Matches the alarms this tool manages against the resources found in the same
+    target. Alarms whose instance, cluster or bucket no longer exists (or whose
+    fleet has no instances left) are reported as orphaned; running instances
+    covered by neither a per-instance nor a fleet CPU alarm are reported as missing.
+    Bucket alarms all live in the default region's CloudWatch, so they are checked
+    against the account-wide bucket list rather than this region's buckets.
+    """
+    cloudwatch = _client(session, 'cloudwatch', region)
+    live = {
+        'instance': {i['InstanceId'] for i in instances if i['State'] != 'terminated'},
+        'cluster': {c['ClusterId'] for c in clusters},
+        'bucket': None,  # listed on the first bucket alarm, as most regions have none
+    }
+
+    findings = []
+    cpu_alarmed = set()
+    for page in cloudwatch.get_paginator('describe_alarms').paginate(AlarmTypes=['MetricAlarm', 'CompositeAlarm']):
+        for alarm in page.get('MetricAlarms', []) + page.get('CompositeAlarms', []):
+            resource = managed_alarm_resource(alarm['AlarmName'])
+            if not resource:
+                continue
+            kind, resource_id = resource
+            if kind == 'fleet':
+                watched = fleet_alarm_instances(alarm, instances) & live['instance']
+                cpu_alarmed |= watched
+                if not watched:
+                    findings.append({'AlarmName': alarm['AlarmName'], 'Resource': resource_id, 'Finding': 'orphaned'})
+                continue
+            if alarm['AlarmName'].startswith('HighCPUUtilization-'):
+                cpu_alarmed.add(resource_id)
+            if kind == 'bucket' and live['bucket'] is None:
+                live['bucket'] = list_account_buckets(session, region)
+            if resource_id not in live[kind]:
+                findings.append({'AlarmName': alarm['AlarmName'], 'Resource': resource_id, 'Finding': 'orphaned'})
+
+    for instance in instances:
+        if instance['State'] == 'running' and instance['InstanceId'] not in cpu_alarmed:
+            findings.append({
+                'AlarmName': f"HighCPUUtilization-{instance['InstanceId']}",
+                'Resource': instance['InstanceId'],
+                'Finding': 'missing',
+            })
+    return findings
@@ -0,0 +1,160 @@
+# boto3/fanout/main_fanout.py
+#
+# Runs EC2 inventory, S3 usage, EMR cluster listing and alarm reconciliation
+# across every (account, region) pair concurrently and merges the results.
+#
+#   python fanout/main_fanout.py --regions us-east-1,ap-south-1
+#   python fanout/main_fanout.py --accounts 111111111111,222222222222 \
+#       --role-name OrganizationAccountAccessRole --regions us-east-1,eu-west-1
+
+import sys
+import os
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+# Ensure the parent directory is in sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fanout.sessions import build_targets
+from fanout.collectors import collect_ec2_inventory, collect_s3_usage, collect_emr_clusters, reconcile_alarms
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DATASETS = ['ec2_instances', 's3_usage', 'emr_clusters', 'alarm_findings']
+
+
+def run_task(target, name, func, *args):
+    """Runs one collector for a target, recording its duration and isolating failures."""
+    start = time.perf_counter()
+    try:
+        rows = func(target['Session'], target['Region'], *args)
+        error = None
+    except Exception as e:
+        logger.error(f"Error running '{name}' for account '{target['Account']}' in '{target['Region']}': {e}")
+        rows = []
+        error = str(e)
+    timing = {
+        'Account': target['Account'],
+        'Region': target['Region'],
+        'Task': name,
+        'Status': 'failed' if error else 'ok',
+        'Rows': len(rows),
+        'Seconds': round(time.perf_counter() - start, 3),
+        'Error': error or '',
+    }
+    return rows, timing
+
+
+def run_target(target):
+    """Collects every dataset for one (account, region) target."""
+    results = {}
+    timings = []
+
+    for name, func in [
+        ('ec2_instances', collect_ec2_inventory),
+        ('s3_usage', collect_s3_usage),
+        ('emr_clusters', collect_emr_clusters),
+    ]:
+        results[name], timing = run_task(target, name, func)
+        timings.append(timing)
+
+    # Reconciliation needs the inventories, so skip it if any of them failed
+    if all(t['Status'] == 'ok' for t in timings):
+        results['alarm_findings'], timing = run_task(
+            target, 'alarm_findings', reconcile_alarms,
+            results['ec2_instances'], results['emr_clusters']
+        )
+    else:
+        results['alarm_findings'] = []
+        timing = {
+            'Account': target['Account'], 'Region': target['Region'], 'Task': 'alarm_findings',
+            'Status': 'skipped', 'Rows': 0, 'Seconds': 0.0, 'Error': 'inventory incomplete',
+        }
+    timings.append(timing)
+
+    for rows in results.values():
+        for row in rows:
+            row['Account'] = target['Account']
+            row['Region'] = target['Region']
+    return results, timings
+
+
+def run_fanout(accounts, regions, role_name=None, max_workers=16):
+    """Runs all collectors across all targets and merges the results into DataFrames."""
+    targets, account_failures = build_targets(accounts, regions, role_name)
+    merged = {name: [] for name in DATASETS}
+    timings = [
+        {'Account': f['Account'], 'Region': '*', 'Task': 'assume_role', 'Status': 'failed',
+         'Rows': 0, 'Seconds': 0.0, 'Error': f['Error']}
+        for f in account_failures
+    ]
+
+    # One worker per target at most: collectors within a target run sequentially, so this
+    # is also the cap on concurrent API calls
+    max_workers = max(1, min(max_workers, len(targets)))
+    logger.info(f"Running fan-out across {len(targets)} targets with {max_workers} workers.")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_target, target) for target in targets]
+        for future in as_completed(futures):
+            results, target_timings = future.result()
+            for name in DATASETS:
+                merged[name].extend(results[name])
+            timings.extend(target_timings)
+
+    datasets = {name: pd.DataFrame(rows) for name, rows in merged.items()}
+    return datasets, pd.DataFrame(timings)
+
+
+def print_timing_report(timings):
+    print("\n--- Fan-out Timing Report ---")
+    if timings.empty:
+        print("No targets were run.\n")
+        return
+    per_target = timings.groupby(['Account', 'Region']).agg(
+        Seconds=('Seconds', 'sum'),
+        Failed=('Status', lambda s: int((s != 'ok').sum())),
+    )
+    print(per_target.to_string())
+    failures = timings[timings['Status'] != 'ok']
+    if not failures.empty:
+        print("\n--- Failures ---")
+        print(failures[['Account', 'Region', 'Task', 'Status', 'Error']].to_string(index=False))
+    print()
+
+
+def save_datasets_to_csv(datasets, timings, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    for name, df in list(datasets.items()) + [('fanout_timings', timings)]:
+        file_path = os.path.join(output_dir, f"{name}.csv")
+        try:
+            df.to_csv(file_path, index=False)
+            logger.info(f"Saved {len(df)} rows to: {file_path}")
+        except Exception as e:
+            logger.error(f"Failed to save '{name}' to CSV: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-account, multi-region inventory and monitoring.")
+    parser.add_argument('--accounts', default='', help="Comma-separated account IDs (default: current account)")
+    parser.add_argument('--role-name', default=None, help="Role to assume in each account")
+    parser.add_argument('--regions', required=True, help="Comma-separated regions")
+    parser.add_argument('--max-workers', type=int, default=16)
+    parser.add_argument('--output-dir', default=os.getcwd())
+    args = parser.parse_args()
+
+    accounts = [a.strip() for a in args.accounts.split(',') if a.strip()]
+    regions = [r.strip() for r in args.regions.split(',') if r.strip()]
+
+    datasets, timings = run_fanout(accounts, regions, args.role_name, args.max_workers)
+    print_timing_report(timings)
+    save_datasets_to_csv(datasets, timings, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import boto3
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def get_account_session(account_id, role_name, session_name='aws-boto3-fanout'):
+    """
+    Assumes role_name in the given account and returns a boto3 session using the
+    temporary credentials. Returns the default session when no role is given.
+    """
+    if not role_name:
+        return boto3.Session()
+
+    role_arn = f"arn:aws:iam::{account_id}:role/{role_name}"
+    sts = boto3.client('sts')
+    response = sts.assume_role(RoleArn=role_arn, RoleSessionName=session_name)
+    credentials = response['Credentials']
+    logger.info(f"Assumed role '{role_arn}'.")
+    return boto3.Session(
+        aws_access_key_id=credentials['AccessKeyId'],
+        aws_secret_access_key=credentials['SecretAccessKey'],
+        aws_session_token=credentials['SessionToken'],
+    )
+
+
+def build_targets(accounts, regions, role_name=None):
+    """
+    Builds one target per (account, region). Each account's role is assumed once
+    and its session is shared by all of that account's regions. Accounts whose role
+    cannot be assumed are returned separately so the caller can report them.
+    """
+    if not accounts:
+        accounts = [boto3.client('sts').get_caller_identity()['Account']]
+        role_name = None
+
+    targets = []
+    failures = []
+    for account_id in accounts:
+        try:
+            session = get_account_session(account_id, role_name)
+        except Exception as e:
+            logger.error(f"Error assuming role in account '{account_id}': {e}")
+            failures.append({'Account': account_id, 'Error': str(e)})
+            continue
+        for region in regions:
+            targets.append({'Account': account_id, 'Region': region, 'Session': session})
+    return targets, failures
@@ -0,0 +1,63 @@
+# boto3/reaper/main_reaper.py
+#
+# Finds WAITING EMR clusters and EC2 instances that have been idle, warns on
+# the existing alert topics and, after a grace period, terminates or stops
+# them. Runs as a dry run unless --execute is given; schedule it (e.g. hourly
+# from cron) so flagged resources are reaped once their grace period passes.
+#
+#   python reaper/main_reaper.py
+#   python reaper/main_reaper.py --execute --grace-hours 4 --exempt-tag Environment=prod
+
+import sys
+import os
+import argparse
+import logging
+
+# Ensure the parent directory is in sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from reaper.reaper import (reap_idle_resources, AUDIT_LOG_PATH, REAPER_STATE_PATH, EXEMPT_TAG,
+                           DEFAULT_GRACE_HOURS, DEFAULT_EMR_IDLE_HOURS, DEFAULT_EC2_IDLE_HOURS, DEFAULT_CPU_THRESHOLD)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def print_reaper_summary(summary, dry_run):
+    print(f"\n--- Idle Resource Reaper{' (dry run)' if dry_run else ''} ---")
+    for resource in summary['idle']:
+        print(f"{resource['Kind'].upper()} {resource['ResourceId']} {resource['Name']}: {resource['Reason']}")
+    print(f"Idle: {len(summary['idle'])}, newly flagged: {len(summary['flagged'])}, reaped: {len(summary['reaped'])}, "
+          f"failed: {len(summary['failed'])}, no longer idle: {len(summary['recovered'])}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stop idle EC2 instances and terminate idle EMR clusters.")
+    parser.add_argument('--execute', action='store_true', help="Flag, notify and reap (default is a dry run)")
+    parser.add_argument('--grace-hours', type=float, default=DEFAULT_GRACE_HOURS)
+    parser.add_argument('--emr-idle-hours', type=float, default=DEFAULT_EMR_IDLE_HOURS)
+    parser.add_argument('--ec2-idle-hours', type=float, default=DEFAULT_EC2_IDLE_HOURS)
+    parser.add_argument('--cpu-threshold', type=float, default=DEFAULT_CPU_THRESHOLD)
+    parser.add_argument('--exempt-tag', action='append', default=[],
+                        help=f"Extra Key or Key=Value exemption (the '{EXEMPT_TAG}' tag always exempts)")
+    parser.add_argument('--state', default=REAPER_STATE_PATH, help="Local state of flagged resources (SQLite)")
+    parser.add_argument('--audit-log', default=AUDIT_LOG_PATH)
+    args = parser.parse_args()
+
+    summary = reap_idle_resources(
+        dry_run=not args.execute,
+        grace_hours=args.grace_hours,
+        emr_idle_hours=args.emr_idle_hours,
+        ec2_idle_hours=args.ec2_idle_hours,
+        cpu_threshold=args.cpu_threshold,
+        exempt_tags=args.exempt_tag,
+        state_path=args.state,
+        audit_path=args.audit_log,
+    )
+    print_reaper_summary(summary, not args.execute)
+    logger.info(f"Audit log: {args.audit_log}")
+
+
+if __name__ == "__main__":
+    main()
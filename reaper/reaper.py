@@ -0,0 +1,327 @@
+import boto3
+import datetime
+import json
+import logging
+import os
+import sqlite3
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+ec2 = boto3.client('ec2')
+# DescribeCluster/ListSteps for every cluster at once hits the EMR API rate limit quickly
+emr = boto3.client('emr', config=Config(max_pool_connections=32, retries={'mode': 'adaptive', 'max_attempts': 10}))
+cloudwatch = boto3.client('cloudwatch')
+sns = boto3.client('sns')
+
+REAPER_STATE_PATH = os.path.join(os.path.expanduser('~'), '.aws-boto3-reaper.db')
+AUDIT_LOG_PATH = os.path.join(os.path.expanduser('~'), '.aws-boto3-reaper-audit.jsonl')
+EXEMPT_TAG = 'idle-reaper:exempt'
+EMR_TAG = 'aws:elasticmapreduce:job-flow-id'
+ASG_TAG = 'aws:autoscaling:groupName'
+# Existing topics from the ec2 and emr menus; warnings go where the alarms already go
+EC2_NOTIFY_TOPIC = 'HighCPUUtilizationAlerts'
+EMR_NOTIFY_TOPIC = 'EMR-ClusterHealth-Alerts'
+
+DEFAULT_EMR_IDLE_HOURS = 1
+DEFAULT_EC2_IDLE_HOURS = 24
+DEFAULT_CPU_THRESHOLD = 5.0
+DEFAULT_GRACE_HOURS = 4
+DEFAULT_MAX_WORKERS = 8
+MAX_METRIC_DATA_QUERIES = 500  # GetMetricData limit per request
+MIN_COVERAGE = 0.8  # share of a window's 5-minute datapoints needed before it can count as idle
+TERMINATE_BATCH = 10
+STOP_BATCH = 100
+
+
+def open_reaper_state(state_path=REAPER_STATE_PATH):
+    conn = sqlite3.connect(state_path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS pending ("
+        "resource_id TEXT PRIMARY KEY, kind TEXT, flagged_at TEXT, reason TEXT)"
+    )
+    return conn
+
+
+def audit(action, resource, dry_run, result='ok', audit_path=AUDIT_LOG_PATH):
+    """Appends one JSON line per decision so every stop or termination can be traced."""
+    entry = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'action': action,
+        'kind': resource['Kind'],
+        'resource_id': resource['ResourceId'],
+        'name': resource.get('Name'),
+        'reason': resource.get('Reason'),
+        'dry_run': dry_run,
+        'result': result,
+    }
+    with open(audit_path, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+
+
+def is_exempt(tags, exempt_tags=()):
+    """A resource is exempt with the reaper tag (any value but 'false') or any of the extra Key=Value tags."""
+    if EXEMPT_TAG in tags and tags[EXEMPT_TAG].lower() != 'false':
+        return True
+    for exempt in exempt_tags:
+        key, _, value = exempt.partition('=')
+        if key in tags and (not value or tags[key] == value):
+            return True
+    return False
+
+
+def _metric_series(queries, start_time, end_time):
+    """Runs MetricStat queries in batches of 500 and returns {query id: [values]}."""
+    values = {}
+    paginator = cloudwatch.get_paginator('get_metric_data')
+    for offset in range(0, len(queries), MAX_METRIC_DATA_QUERIES):
+        for page in paginator.paginate(MetricDataQueries=queries[offset:offset + MAX_METRIC_DATA_QUERIES],
+                                       StartTime=start_time, EndTime=end_time):
+            for result in page['MetricDataResults']:
+                values.setdefault(result['Id'], []).extend(result['Values'])
+    return values
+
+
+def _metric_query(query_id, namespace, metric_name, dimension, value, stat):
+    return {
+        'Id': query_id,
+        'MetricStat': {
+            'Metric': {'Namespace': namespace, 'MetricName': metric_name,
+                       'Dimensions': [{'Name': dimension, 'Value': value}]},
+            'Period': 300,
+            'Stat': stat,
+        },
+    }
+
+
+def _describe_cluster_activity(cluster_id, since):
+    """Tags, protection and whether any step is active or ended after since."""
+    cluster = emr.describe_cluster(ClusterId=cluster_id)['Cluster']
+    busy = False
+    for page in emr.get_paginator('list_steps').paginate(ClusterId=cluster_id):
+        for step in page['Steps']:
+            timeline = step['Status'].get('Timeline', {})
+            if step['Status']['State'] in ('PENDING', 'RUNNING', 'CANCEL_PENDING') or \
+                    timeline.get('EndDateTime', since) > since:
+                busy = True
+                break
+        if busy:
+            break
+    return cluster, busy
+
+
+def find_idle_clusters(idle_hours=DEFAULT_EMR_IDLE_HOURS, exempt_tags=(), max_workers=DEFAULT_MAX_WORKERS):
+    """
+    WAITING clusters that reported IsIdle for the whole window, ran no step in
+    it and are neither termination protected nor exempt by tag. Clusters with
+    too few IsIdle datapoints are skipped rather than assumed idle.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    since = now - datetime.timedelta(hours=idle_hours)
+    clusters = []
+    for page in emr.get_paginator('list_clusters').paginate(ClusterStates=['WAITING']):
+        clusters.extend(c for c in page['Clusters'] if c['Status']['Timeline']['CreationDateTime'] < since)
+    if not clusters:
+        return []
+
+    queries = [_metric_query(f"c{n}", 'AWS/ElasticMapReduce', 'IsIdle', 'JobFlowId', c['Id'], 'Minimum')
+               for n, c in enumerate(clusters)]
+    is_idle = _metric_series(queries, since, now)
+
+    def check(n):
+        try:
+            return _describe_cluster_activity(clusters[n]['Id'], since)
+        except Exception as e:
+            logger.error(f"Error checking activity of EMR cluster '{clusters[n]['Id']}': {e}")
+            return None, True
+
+    idle = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for n, (cluster, busy) in enumerate(executor.map(check, range(len(clusters)))):
+            series = is_idle.get(f"c{n}", [])
+            if busy or (series and min(series) < 1):
+                continue
+            if len(series) < idle_hours * 12 * MIN_COVERAGE:
+                logger.warning(f"Skipping EMR cluster '{cluster['Id']}': {len(series)} IsIdle datapoints "
+                               f"in {idle_hours}h is too few to tell whether it is idle.")
+                continue
+            tags = {t['Key']: t['Value'] for t in cluster.get('Tags', [])}
+            if cluster.get('TerminationProtected') or is_exempt(tags, exempt_tags):
+                continue
+            idle.append({
+                'Kind': 'emr',
+                'ResourceId': cluster['Id'],
+                'Name': cluster['Name'],
+                'Reason': f"WAITING with no steps and IsIdle throughout for {idle_hours}h",
+            })
+    return idle
+
+
+def find_idle_instances(idle_hours=DEFAULT_EC2_IDLE_HOURS, cpu_threshold=DEFAULT_CPU_THRESHOLD, exempt_tags=()):
+    """
+    Running instances outside EMR and Auto Scaling whose 5-minute average CPU
+    stayed below cpu_threshold for the whole window.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    since = now - datetime.timedelta(hours=idle_hours)
+    instances = []
+    for page in ec2.get_paginator('describe_instances').paginate(
+            Filters=[{'Name': 'instance-state-name', 'Values': ['running']}]):
+        for reservation in page['Reservations']:
+            for instance in reservation['Instances']:
+                tags = {t['Key']: t['Value'] for t in instance.get('Tags', [])}
+                # EMR nodes are reaped with their cluster; ASGs would just replace a stopped instance
+                if EMR_TAG in tags or ASG_TAG in tags or instance['LaunchTime'] >= since:
+                    continue
+                # Spot and instance-store-root instances cannot be stopped, only terminated
+                if instance.get('InstanceLifecycle') == 'spot' or instance.get('RootDeviceType') == 'instance-store':
+                    continue
+                if not is_exempt(tags, exempt_tags):
+                    instances.append((instance['InstanceId'], tags.get('Name', '')))
+    if not instances:
+        return []
+
+    queries = [_metric_query(f"i{n}", 'AWS/EC2', 'CPUUtilization', 'InstanceId', instance_id, 'Average')
+               for n, (instance_id, _) in enumerate(instances)]
+    cpu = _metric_series(queries, since, now)
+
+    idle = []
+    for n, (instance_id, name) in enumerate(instances):
+        series = cpu.get(f"i{n}", [])
+        if len(series) >= idle_hours * 12 * MIN_COVERAGE and max(series) < cpu_threshold:
+            idle.append({
+                'Kind': 'ec2',
+                'ResourceId': instance_id,
+                'Name': name,
+                'Reason': f"CPU below {cpu_threshold}% (peak {max(series):.1f}%) for {idle_hours}h",
+            })
+    return idle
+
+
+def find_topic_arn(topic_name):
+    for page in sns.get_paginator('list_topics').paginate():
+        for topic in page['Topics']:
+            if topic['TopicArn'].rsplit(':', 1)[-1] == topic_name:
+                return topic['TopicArn']
+    return None
+
+
+def notify(resources, message_header, topic_arns):
+    """Publishes one message per kind listing the resources to the existing alert topic."""
+    for kind in ('ec2', 'emr'):
+        matching = [r for r in resources if r['Kind'] == kind]
+        if not matching:
+            continue
+        if not topic_arns.get(kind):
+            logger.warning(f"No SNS topic found for {kind} reaper notifications; skipping.")
+            continue
+        lines = [f"{r['ResourceId']} {r['Name']}: {r['Reason']}" for r in matching]
+        try:
+            sns.publish(TopicArn=topic_arns[kind], Subject=f"Idle {kind.upper()} resources"[:100],
+                        Message=message_header + '\n\n' + '\n'.join(lines))
+        except Exception as e:
+            logger.error(f"Error publishing the reaper notification for {kind}: {e}")
+
+
+def _terminate_clusters(cluster_ids):
+    failed = set()
+    for offset in range(0, len(cluster_ids), TERMINATE_BATCH):
+        batch = cluster_ids[offset:offset + TERMINATE_BATCH]
+        try:
+            emr.terminate_job_flows(JobFlowIds=batch)
+        except Exception as e:
+            logger.error(f"Error terminating EMR clusters {batch}: {e}")
+            failed.update(batch)
+    return failed
+
+
+def _stop_batch(batch, dry_run):
+    """Stops a batch of instances. Returns the error, or None on success."""
+    try:
+        ec2.stop_instances(InstanceIds=batch, DryRun=dry_run)
+    except Exception as e:
+        # A successful dry run is reported as an error
+        if dry_run and 'DryRunOperation' in str(e):
+            return None
+        return e
+    return None
+
+
+def _stop_instances(instance_ids, dry_run):
+    failed = set()
+    for offset in range(0, len(instance_ids), STOP_BATCH):
+        batch = instance_ids[offset:offset + STOP_BATCH]
+        error = _stop_batch(batch, dry_run)
+        if error is None:
+            continue
+        if len(batch) > 1:
+            # StopInstances is all-or-nothing, so one instance that cannot stop blocks the batch
+            logger.warning(f"Error stopping a batch of {len(batch)} EC2 instances ({error}). Retrying one at a time.")
+            batch_failures = [instance_id for instance_id in batch if _stop_batch([instance_id], dry_run) is not None]
+        else:
+            batch_failures = batch
+        if batch_failures:
+            logger.error(f"Error stopping EC2 instances {batch_failures}")
+            failed.update(batch_failures)
+    return failed
+
+
+def reap_idle_resources(dry_run=True, grace_hours=DEFAULT_GRACE_HOURS, emr_idle_hours=DEFAULT_EMR_IDLE_HOURS,
+                        ec2_idle_hours=DEFAULT_EC2_IDLE_HOURS, cpu_threshold=DEFAULT_CPU_THRESHOLD, exempt_tags=(),
+                        topic_arns=None, state_path=REAPER_STATE_PATH, audit_path=AUDIT_LOG_PATH):
+    """
+    Finds idle clusters and instances. Newly idle resources are flagged and
+    announced on the alert topics; those still idle once grace_hours have
+    passed since flagging are terminated (EMR) or stopped (EC2) in batches.
+    Resources that became busy again are unflagged. A dry run changes nothing
+    and records its decisions in the audit log.
+    """
+    idle = find_idle_clusters(emr_idle_hours, exempt_tags) + find_idle_instances(ec2_idle_hours, cpu_threshold, exempt_tags)
+    if topic_arns is None:
+        topic_arns = {'ec2': find_topic_arn(EC2_NOTIFY_TOPIC), 'emr': find_topic_arn(EMR_NOTIFY_TOPIC)}
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    conn = open_reaper_state(state_path)
+    try:
+        pending = {row[0]: datetime.datetime.fromisoformat(row[1])
+                   for row in conn.execute("SELECT resource_id, flagged_at FROM pending")}
+        idle_ids = {r['ResourceId'] for r in idle}
+        recovered = [resource_id for resource_id in pending if resource_id not in idle_ids]
+        new = [r for r in idle if r['ResourceId'] not in pending]
+        due = [r for r in idle if r['ResourceId'] in pending
+               and now - pending[r['ResourceId']] >= datetime.timedelta(hours=grace_hours)]
+
+        for resource in new:
+            audit('flag', resource, dry_run, audit_path=audit_path)
+        if dry_run:
+            # EC2 can check permissions without acting; EMR has no dry-run mode
+            failed = _stop_instances([r['ResourceId'] for r in due if r['Kind'] == 'ec2'], dry_run=True)
+            for resource in due:
+                audit('terminate' if resource['Kind'] == 'emr' else 'stop', resource, dry_run,
+                      'denied' if resource['ResourceId'] in failed else 'planned', audit_path)
+            logger.info(f"Dry run: {len(new)} resources would be flagged, {len(due)} stopped or terminated.")
+            return {'idle': idle, 'flagged': new, 'reaped': [], 'failed': sorted(failed), 'recovered': recovered}
+
+        conn.executemany("DELETE FROM pending WHERE resource_id = ?", [(r,) for r in recovered])
+        conn.executemany("INSERT INTO pending VALUES (?, ?, ?, ?)",
+                         [(r['ResourceId'], r['Kind'], now.isoformat(), r['Reason']) for r in new])
+        conn.commit()
+        notify(new, f"These resources are idle and will be stopped or terminated in {grace_hours}h unless they "
+                    f"become busy or get the '{EXEMPT_TAG}' tag:", topic_arns)
+
+        failed = _terminate_clusters([r['ResourceId'] for r in due if r['Kind'] == 'emr'])
+        failed |= _stop_instances([r['ResourceId'] for r in due if r['Kind'] == 'ec2'], dry_run=False)
+        reaped = [r for r in due if r['ResourceId'] not in failed]
+        for resource in due:
+            audit('terminate' if resource['Kind'] == 'emr' else 'stop', resource, dry_run,
+                  'failed' if resource['ResourceId'] in failed else 'ok', audit_path)
+        conn.executemany("DELETE FROM pending WHERE resource_id = ?", [(r['ResourceId'],) for r in reaped])
+        conn.commit()
+        notify(reaped, "These idle resources were stopped or terminated:", topic_arns)
+    finally:
+        conn.close()
+
+    logger.info(f"Reaper: {len(idle)} idle, {len(new)} newly flagged, {len(reaped)} reaped, "
+                f"{len(due) - len(reaped)} failed, {len(recovered)} no longer idle.")
+    return {'idle': idle, 'flagged': new, 'reaped': reaped, 'failed': sorted(failed), 'recovered': recovered}
@@ -50,7 +50,10 @@ def create_or_get_sns_topic():
         return None
 
 def subscribe_to_sns(topic_arn):
-    email = input("Enter the email address to receive alerts: ")
+    email = input("Enter the email address to receive alerts (leave blank to skip): ").strip()
+    if not email:
+        logger.info("No email address given. Skipping the email subscription.")
+        return
     try:
         sns.subscribe(
             TopicArn=topic_arn,
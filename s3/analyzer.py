@@ -0,0 +1,253 @@
+import datetime
+import heapq
+import json
+import logging
+import math
+import os
+
+from s3_operations import iter_bucket_objects
+
+logger = logging.getLogger(__name__)
+
+AGE_BUCKETS_DAYS = [1, 7, 30, 90, 365]
+HISTOGRAM_SUBBUCKETS = 4  # per power of two, ~19% worst-case error on size quantiles
+
+
+class PrefixTree:
+    """
+    Object count and bytes per prefix, down to max_depth '/'-separated levels.
+    Once max_nodes prefixes exist, deeper new prefixes are folded into their
+    deepest tracked ancestor, so memory stays bounded on any bucket.
+    """
+
+    def __init__(self, max_depth=3, max_nodes=100000):
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.nodes = {}
+        self.folded_objects = 0
+
+    def add(self, key, size):
+        parts = key.split('/')[:-1][:self.max_depth]
+        prefix = ''
+        for part in parts:
+            prefix = f"{prefix}{part}/"
+            node = self.nodes.get(prefix)
+            if node is None:
+                if len(self.nodes) >= self.max_nodes:
+                    self.folded_objects += 1
+                    return
+                node = self.nodes[prefix] = [0, 0]
+            node[0] += 1
+            node[1] += size
+
+    def largest(self, limit, depth=None):
+        """Largest prefixes by bytes, optionally only at one depth."""
+        nodes = self.nodes.items()
+        if depth is not None:
+            nodes = ((p, n) for p, n in nodes if p.count('/') == depth)
+        return [
+            {'Prefix': prefix, 'Objects': objects, 'Bytes': size}
+            for prefix, (objects, size) in heapq.nlargest(limit, nodes, key=lambda item: item[1][1])
+        ]
+
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving heavy hitters: tracks the k heaviest items of an
+    unbounded stream in O(k) memory. Each reported weight overestimates the
+    true weight by at most its recorded error.
+    """
+
+    def __init__(self, k=1000):
+        self.k = k
+        self.counters = {}  # item -> [weight, error]
+        self._heap = []  # (weight, item), possibly stale; refreshed lazily on eviction
+
+    def add(self, item, weight):
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+            return
+        if len(self.counters) < self.k:
+            self.counters[item] = [weight, 0]
+            heapq.heappush(self._heap, (weight, item))
+            return
+
+        # Weights only grow, so a heap entry below its counter is stale: refresh it and look again
+        while True:
+            floor, victim = heapq.heappop(self._heap)
+            current = self.counters[victim][0]
+            if current == floor:
+                break
+            heapq.heappush(self._heap, (current, victim))
+        del self.counters[victim]
+        self.counters[item] = [floor + weight, floor]
+        heapq.heappush(self._heap, (floor + weight, item))
+
+    def top(self, limit):
+        return [
+            {'Item': item, 'Weight': weight, 'MaxError': error}
+            for item, (weight, error) in heapq.nlargest(limit, self.counters.items(), key=lambda i: i[1][0])
+        ]
+
+
+class SizeHistogram:
+    """Log-scale histogram of object sizes with a fixed number of buckets."""
+
+    def __init__(self):
+        self.counts = {}
+        self.bytes = {}
+        self.total = 0
+
+    @staticmethod
+    def _index(size):
+        return -1 if size == 0 else int(math.log2(size) * HISTOGRAM_SUBBUCKETS)
+
+    @staticmethod
+    def _lower_bound(index):
+        return 0 if index < 0 else int(2 ** (index / HISTOGRAM_SUBBUCKETS))
+
+    def add(self, size):
+        index = self._index(size)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.bytes[index] = self.bytes.get(index, 0) + size
+        self.total += 1
+
+    def quantile(self, q):
+        """Approximate size at quantile q, as the lower bound of the bucket it falls in."""
+        target = q * self.total
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return self._lower_bound(index)
+        return 0
+
+    def octaves(self):
+        """Collapses the sub-buckets to one row per power of two for reporting."""
+        rows = {}
+        for index, count in self.counts.items():
+            octave = 0 if index < 0 else self._lower_bound(index - index % HISTOGRAM_SUBBUCKETS)
+            row = rows.setdefault(octave, {'MinBytes': octave, 'Objects': 0, 'Bytes': 0})
+            row['Objects'] += count
+            row['Bytes'] += self.bytes[index]
+        return [rows[k] for k in sorted(rows)]
+
+
+def _age_label(age_days):
+    for limit in AGE_BUCKETS_DAYS:
+        if age_days < limit:
+            return f"<{limit}d"
+    return f">={AGE_BUCKETS_DAYS[-1]}d"
+
+
+def _age_lower_bound(label):
+    """Lower bound in days of an age bucket label, so '<7d' sorts before '<30d'."""
+    if label.startswith('>='):
+        return int(label[2:-1])
+    limit = int(label[1:-1])
+    index = AGE_BUCKETS_DAYS.index(limit)
+    return AGE_BUCKETS_DAYS[index - 1] if index else 0
+
+
+def analyze_bucket(bucket_name, prefix='', max_depth=3, max_prefixes=100000, top_k=100, hot_prefixes=1000):
+    """
+    Streams the bucket listing once and builds, in bounded memory, a prefix
+    tree with aggregated sizes, a size histogram, the top-K largest objects,
+    heavy-hitter directories at any depth, and age and storage-class buckets.
+    """
+    tree = PrefixTree(max_depth, max_prefixes)
+    hotspots = SpaceSaving(hot_prefixes)
+    histogram = SizeHistogram()
+    largest = []  # min-heap of (size, key, last modified)
+    ages = {}
+    storage_classes = {}
+    now = datetime.datetime.now(datetime.timezone.utc)
+    total_bytes = 0
+
+    for obj in iter_bucket_objects(bucket_name, prefix):
+        key, size = obj['Key'], obj['Size']
+        total_bytes += size
+        tree.add(key, size)
+        histogram.add(size)
+        directory = key.rsplit('/', 1)[0] + '/' if '/' in key else '/'
+        hotspots.add(directory, size)
+
+        entry = (size, key, obj['LastModified'].isoformat())
+        if len(largest) < top_k:
+            heapq.heappush(largest, entry)
+        elif size > largest[0][0]:
+            heapq.heapreplace(largest, entry)
+
+        for table, label in ((ages, _age_label((now - obj['LastModified']).days)),
+                             (storage_classes, obj.get('StorageClass', 'STANDARD'))):
+            row = table.setdefault(label, [0, 0])
+            row[0] += 1
+            row[1] += size
+
+    report = {
+        'Bucket': bucket_name,
+        'Prefix': prefix,
+        'GeneratedAt': now.isoformat(),
+        'Objects': histogram.total,
+        'Bytes': total_bytes,
+        'SizeQuantiles': {f"p{int(q * 100)}": histogram.quantile(q) for q in (0.5, 0.9, 0.99)},
+        'SizeHistogram': histogram.octaves(),
+        'LargestPrefixes': tree.largest(50),
+        'TopLevelPrefixes': tree.largest(50, depth=1),
+        'PrefixTreeFoldedObjects': tree.folded_objects,
+        'HotDirectories': hotspots.top(50),
+        'LargestObjects': [
+            {'Key': key, 'Bytes': size, 'LastModified': modified}
+            for size, key, modified in sorted(largest, reverse=True)
+        ],
+        'AgeBuckets': {label: {'Objects': o, 'Bytes': b} for label, (o, b) in ages.items()},
+        'StorageClasses': {label: {'Objects': o, 'Bytes': b} for label, (o, b) in storage_classes.items()},
+    }
+    logger.info(f"Analyzed {report['Objects']} objects ({total_bytes / 1024 / 1024:.2f} MB) in bucket '{bucket_name}'.")
+    return report
+
+
+def print_bucket_report(report, limit=10):
+    mb = 1024 * 1024
+    print(f"\n--- Analysis of 's3://{report['Bucket']}/{report['Prefix']}' ---")
+    print(f"Objects: {report['Objects']}, Total: {report['Bytes'] / mb:.2f} MB, "
+          f"Size p50/p90/p99: {report['SizeQuantiles']['p50']}/{report['SizeQuantiles']['p90']}/"
+          f"{report['SizeQuantiles']['p99']} bytes")
+
+    print("\nLargest prefixes:")
+    for row in report['LargestPrefixes'][:limit]:
+        print(f"  {row['Prefix']}: {row['Bytes'] / mb:.2f} MB in {row['Objects']} objects")
+    print("\nLargest objects:")
+    for row in report['LargestObjects'][:limit]:
+        print(f"  {row['Key']}: {row['Bytes'] / mb:.2f} MB (modified {row['LastModified']})")
+    print("\nSize distribution:")
+    for row in report['SizeHistogram']:
+        print(f"  >= {row['MinBytes']} bytes: {row['Objects']} objects, {row['Bytes'] / mb:.2f} MB")
+    print("\nAge:")
+    for label, row in sorted(report['AgeBuckets'].items(), key=lambda item: _age_lower_bound(item[0])):
+        print(f"  {label}: {row['Objects']} objects, {row['Bytes'] / mb:.2f} MB")
+    print()
+
+
+def save_bucket_report(report, file_name=None):
+    """Writes the report as compact JSON to the working directory."""
+    file_path = os.path.join(os.getcwd(), file_name or f"{report['Bucket']}_analysis.json")
+    try:
+        with open(file_path, 'w') as f:
+            json.dump(report, f, separators=(',', ':'))
+        logger.info(f"Bucket analysis report saved at: {file_path}")
+    except Exception as e:
+        logger.error(f"Failed to save the bucket analysis report: {e}")
+
+
+def analyze_bucket_menu():
+    bucket_name = input("Enter the bucket name to analyze: ").strip()
+    prefix = input("Enter the prefix (optional): ").strip()
+    try:
+        report = analyze_bucket(bucket_name, prefix)
+    except Exception as e:
+        logger.error(f"Error analyzing bucket '{bucket_name}': {e}")
+        return
+    print_bucket_report(report)
+    save_bucket_report(report)
@@ -0,0 +1,186 @@
+import boto3
+import datetime
+import logging
+import re
+import time
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = 1000  # DeleteObjects limit
+DEFAULT_MAX_WORKERS = 16
+RETRYABLE_ERRORS = {'SlowDown', 'InternalError', 'ServiceUnavailable'}
+MAX_BATCH_RETRIES = 3
+
+# Adaptive retries back off client-side when S3 throttles a hot prefix
+s3 = boto3.client('s3', config=Config(max_pool_connections=64, retries={'mode': 'adaptive', 'max_attempts': 10}))
+
+
+def _iter_objects(bucket_name, prefix, all_versions):
+    """Streams objects (or every version and delete marker) under the prefix from a paginated listing."""
+    if all_versions:
+        paginator = s3.get_paginator('list_object_versions')
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+            for version in page.get('Versions', []):
+                yield version
+            for marker in page.get('DeleteMarkers', []):
+                yield dict(marker, Size=0)
+    else:
+        paginator = s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+            yield from page.get('Contents', [])
+
+
+def iter_matching_objects(bucket_name, prefix='', older_than_days=None, min_size=None, max_size=None,
+                          pattern=None, all_versions=False):
+    """Streams the objects under the prefix that pass every given filter."""
+    cutoff = None
+    if older_than_days is not None:
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=older_than_days)
+    regex = re.compile(pattern) if pattern else None
+
+    for obj in _iter_objects(bucket_name, prefix, all_versions):
+        if cutoff and obj['LastModified'] >= cutoff:
+            continue
+        if min_size is not None and obj['Size'] < min_size:
+            continue
+        if max_size is not None and obj['Size'] > max_size:
+            continue
+        if regex and not regex.search(obj['Key']):
+            continue
+        yield obj
+
+
+def _batched(objects, size):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _delete_batch(bucket_name, batch):
+    """
+    Deletes one batch of up to 1,000 objects, retrying keys that failed with a
+    throttling or transient error. Returns (deleted count, bytes, errors).
+    """
+    sizes = {(obj['Key'], obj.get('VersionId')): obj['Size'] for obj in batch}
+    remaining = [
+        {'Key': obj['Key'], 'VersionId': obj['VersionId']} if obj.get('VersionId') else {'Key': obj['Key']}
+        for obj in batch
+    ]
+    errors = []
+    for attempt in range(MAX_BATCH_RETRIES + 1):
+        response = s3.delete_objects(Bucket=bucket_name, Delete={'Objects': remaining, 'Quiet': True})
+        errors = response.get('Errors', [])
+        retryable = [e for e in errors if e['Code'] in RETRYABLE_ERRORS]
+        if not retryable or attempt == MAX_BATCH_RETRIES:
+            break
+        remaining = [{'Key': e['Key'], 'VersionId': e['VersionId']} if e.get('VersionId') else {'Key': e['Key']}
+                     for e in retryable]
+        errors = [e for e in errors if e['Code'] not in RETRYABLE_ERRORS]
+        time.sleep(2 ** attempt)
+
+    failed = {(e['Key'], e.get('VersionId')) for e in errors}
+    deleted = [k for k in sizes if k not in failed]
+    return len(deleted), sum(sizes[k] for k in deleted), errors
+
+
+def delete_objects_matching(bucket_name, prefix='', older_than_days=None, min_size=None, max_size=None,
+                            pattern=None, all_versions=False, dry_run=False, max_workers=DEFAULT_MAX_WORKERS,
+                            max_reported_errors=100):
+    """
+    Deletes every object under the prefix that matches the filters, sending
+    1,000-key DeleteObjects requests concurrently while the listing streams in.
+    With all_versions, every version and delete marker is removed as well, which
+    is what actually frees space in a versioned bucket. Returns a summary dict.
+    """
+    summary = {'Matched': 0, 'MatchedBytes': 0, 'Deleted': 0, 'DeletedBytes': 0, 'Failed': 0, 'Errors': []}
+
+    def record(result):
+        deleted, deleted_bytes, errors = result
+        summary['Deleted'] += deleted
+        summary['DeletedBytes'] += deleted_bytes
+        summary['Failed'] += len(errors)
+        room = max_reported_errors - len(summary['Errors'])
+        summary['Errors'].extend(errors[:max(room, 0)])
+
+    def drain(futures):
+        """Records every finished batch and returns the first error instead of stopping at it."""
+        error = None
+        for future in futures:
+            try:
+                record(future.result())
+            except Exception as e:
+                error = error or e
+        return error
+
+    try:
+        if not all_versions:
+            status = s3.get_bucket_versioning(Bucket=bucket_name).get('Status')
+            if status in ('Enabled', 'Suspended'):
+                logger.warning(f"Bucket '{bucket_name}' is versioned; deleting without all_versions only adds delete markers.")
+
+        objects = iter_matching_objects(bucket_name, prefix, older_than_days, min_size, max_size, pattern, all_versions)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = set()
+            try:
+                for batch in _batched(objects, DELETE_BATCH_SIZE):
+                    summary['Matched'] += len(batch)
+                    summary['MatchedBytes'] += sum(obj['Size'] for obj in batch)
+                    if dry_run:
+                        continue
+
+                    in_flight.add(executor.submit(_delete_batch, bucket_name, batch))
+                    # Keep a bounded number of batches in memory while the listing runs ahead
+                    if len(in_flight) >= max_workers * 2:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        error = drain(done)
+                        if error:
+                            raise error
+            finally:
+                # Batches still in flight when the listing or a batch fails have deleted real objects
+                error = drain(in_flight)
+            if error:
+                raise error
+    except Exception as e:
+        logger.error(f"Error deleting objects from bucket '{bucket_name}': {e}")
+        summary['Errors'].append({'Key': '*', 'Code': type(e).__name__, 'Message': str(e)})
+
+    if dry_run:
+        logger.info(f"Dry run: {summary['Matched']} objects ({summary['MatchedBytes'] / 1024 / 1024:.2f} MB) "
+                    f"under 's3://{bucket_name}/{prefix}' would be deleted.")
+    else:
+        logger.info(f"Deleted {summary['Deleted']} of {summary['Matched']} objects "
+                    f"({summary['DeletedBytes'] / 1024 / 1024:.2f} MB) under 's3://{bucket_name}/{prefix}'.")
+        if summary['Failed']:
+            logger.error(f"Failed to delete {summary['Failed']} objects. First error: {summary['Errors'][0]}")
+    return summary
+
+
+def split_s3_uri(uri):
+    """Splits 's3://bucket/prefix' into (bucket, prefix)."""
+    path = uri[len('s3://'):] if uri.startswith('s3://') else uri
+    bucket_name, _, prefix = path.partition('/')
+    return bucket_name, prefix
+
+
+def _optional_number(prompt, cast):
+    value = input(prompt).strip()
+    return cast(value) if value else None
+
+
+def cleanup_menu():
+    bucket_name = input("Enter the bucket name: ").strip()
+    prefix = input("Enter the prefix (optional): ").strip()
+    older_than_days = _optional_number("Delete objects older than N days (optional): ", float)
+    min_size = _optional_number("Minimum object size in bytes (optional): ", int)
+    max_size = _optional_number("Maximum object size in bytes (optional): ", int)
+    pattern = input("Key regex (optional): ").strip() or None
+    all_versions = input("Delete all versions and delete markers? (y/n): ").strip().lower() == 'y'
+    dry_run = input("Dry run only? (y/n): ").strip().lower() == 'y'
+    delete_objects_matching(bucket_name, prefix, older_than_days, min_size, max_size, pattern, all_versions, dry_run)
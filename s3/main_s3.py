@@ -9,6 +9,10 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from s3_operations import *
 from alert import *
+from monitoring import show_usage_analytics
+from transfer import upload_file_menu, download_file_menu
+from cleanup import cleanup_menu
+from analyzer import analyze_bucket_menu
 
 # Set up color logging
 handler = colorlog.StreamHandler()
@@ -35,7 +39,12 @@ def main_menu():
         print("3. List Bucket Objects")
         print("4. Show Usage")
         print("5. Turn ON/OFF Alerts")
-        print("6. Exit")
+        print("6. Upload File")
+        print("7. Download File")
+        print("8. Sync Directory")
+        print("9. Clean Up Objects")
+        print("10. Analyze Bucket")
+        print("11. Exit")
 
         choice = input("Select an option: ").strip()
 
@@ -46,10 +55,24 @@ def main_menu():
         elif choice == '3':
             list_bucket_objects()
         elif choice == '4':
-            show_usage()
+            source = input("Usage from (1) CloudWatch daily metrics or (2) full object listing? ").strip()
+            if source == '2':
+                show_usage()
+            else:
+                show_usage_analytics()
         elif choice == '5':
             manage_alerts()
         elif choice == '6':
+            upload_file_menu()
+        elif choice == '7':
+            download_file_menu()
+        elif choice == '8':
+            sync_menu()
+        elif choice == '9':
+            cleanup_menu()
+        elif choice == '10':
+            analyze_bucket_menu()
+        elif choice == '11':
             logger.info("Exiting...")
             sys.exit(0)
         else:
@@ -1,4 +1,5 @@
 import boto3
+import datetime
 import logging
 import colorlog
 import sys
@@ -7,6 +8,8 @@ import os
 # Ensure the parent directory is in sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from s3_operations import s3, iter_bucket_objects
+
 # Set up color logging
 handler = colorlog.StreamHandler()
 handler.setFormatter(colorlog.ColoredFormatter(
@@ -26,6 +29,9 @@ logger.setLevel(logging.INFO)
 
 cloudwatch = boto3.client('cloudwatch')
 
+S3_METRIC_DAYS = 14  # history used for growth trends
+MAX_METRIC_DATA_QUERIES = 500  # GetMetricData limit per request
+
 
 def create_or_update_cloudwatch_alarm(bucket_name, size_threshold, object_threshold, topic_arn):
     try:
@@ -122,3 +128,175 @@ def create_or_update_cloudwatch_alarm(bucket_name, size_threshold, object_thresh
     except Exception as e:
         logger.error(f"Error creating or updating CloudWatch alarm: {e}")
 
+
+def bucket_regions(buckets):
+    """
+    Groups ListBuckets entries by the region they live in, as {region: [bucket name, ...]}.
+    ListBuckets already reports each bucket's region; GetBucketLocation is only
+    called for entries without one.
+    """
+    regions = {}
+    for bucket in buckets:
+        bucket_name = bucket['Name']
+        region = bucket.get('BucketRegion')
+        if not region:
+            try:
+                location = s3.get_bucket_location(Bucket=bucket_name)['LocationConstraint']
+            except Exception as e:
+                logger.error(f"Error getting the region of bucket '{bucket_name}': {e}")
+                continue
+            # us-east-1 reports no location constraint, and the oldest eu-west-1 buckets report 'EU'
+            region = {None: 'us-east-1', '': 'us-east-1', 'EU': 'eu-west-1'}.get(location, location)
+        regions.setdefault(region, []).append(bucket_name)
+    return regions
+
+def list_bucket_storage_series(region_cloudwatch):
+    """
+    Lists every (bucket, metric, storage type) series S3 has published to
+    CloudWatch in the client's region, so only series that exist are queried.
+    """
+    series = []
+    paginator = region_cloudwatch.get_paginator('list_metrics')
+    for metric_name in ('BucketSizeBytes', 'NumberOfObjects'):
+        for page in paginator.paginate(Namespace='AWS/S3', MetricName=metric_name):
+            for metric in page['Metrics']:
+                dimensions = {d['Name']: d['Value'] for d in metric['Dimensions']}
+                if 'BucketName' in dimensions and 'StorageType' in dimensions:
+                    series.append((dimensions['BucketName'], metric_name, dimensions['StorageType']))
+    return series
+
+def fetch_region_storage_metrics(region_cloudwatch, bucket_names, days=S3_METRIC_DAYS):
+    """
+    Fetches the daily BucketSizeBytes/NumberOfObjects datapoints of the given
+    buckets from one region's CloudWatch, 500 series per GetMetricData call.
+    Returns {(bucket, metric, storage type): [(timestamp, value), ...]} oldest first.
+    """
+    bucket_names = set(bucket_names)
+    series = [key for key in list_bucket_storage_series(region_cloudwatch) if key[0] in bucket_names]
+    end_time = datetime.datetime.utcnow()
+    start_time = end_time - datetime.timedelta(days=days)
+    datapoints = {key: [] for key in series}
+
+    paginator = region_cloudwatch.get_paginator('get_metric_data')
+    for offset in range(0, len(series), MAX_METRIC_DATA_QUERIES):
+        queries = [
+            {
+                'Id': f"m{offset + i}",
+                'MetricStat': {
+                    'Metric': {
+                        'Namespace': 'AWS/S3',
+                        'MetricName': metric_name,
+                        'Dimensions': [
+                            {'Name': 'BucketName', 'Value': bucket_name},
+                            {'Name': 'StorageType', 'Value': storage_type}
+                        ]
+                    },
+                    'Period': 86400,  # S3 publishes storage metrics once a day
+                    'Stat': 'Average',
+                },
+                'ReturnData': True,
+            }
+            for i, (bucket_name, metric_name, storage_type) in enumerate(series[offset:offset + MAX_METRIC_DATA_QUERIES])
+        ]
+        for page in paginator.paginate(MetricDataQueries=queries, StartTime=start_time, EndTime=end_time,
+                                       ScanBy='TimestampAscending'):
+            for result in page['MetricDataResults']:
+                datapoints[series[int(result['Id'][1:])]].extend(zip(result['Timestamps'], result['Values']))
+
+    for points in datapoints.values():
+        points.sort()
+    return datapoints
+
+def fetch_bucket_storage_metrics(buckets, days=S3_METRIC_DAYS):
+    """
+    S3 publishes storage metrics only to CloudWatch in the bucket's own
+    region, so buckets are grouped by region and each group is batched
+    through one CloudWatch client for that region.
+    """
+    datapoints = {}
+    regions = bucket_regions(buckets)
+    for region, names in regions.items():
+        region_cloudwatch = boto3.client('cloudwatch', region_name=region)
+        try:
+            datapoints.update(fetch_region_storage_metrics(region_cloudwatch, names, days))
+        except Exception as e:
+            logger.error(f"Error fetching S3 storage metrics in {region}: {e}")
+    logger.info(f"Fetched {len(datapoints)} S3 storage metric series from {len(regions)} regions.")
+    return datapoints
+
+def summarize_bucket_storage(datapoints):
+    """Rolls the metric series up to per-bucket size, object count and growth per day."""
+    usage = {}
+    for (bucket_name, metric_name, storage_type), points in datapoints.items():
+        if not points:
+            continue
+        bucket = usage.setdefault(bucket_name, {
+            'BucketName': bucket_name,
+            'SizeBytes': 0.0,
+            'Objects': None,
+            'GrowthBytesPerDay': 0.0,
+            'StorageTypes': {},
+            'Source': 'cloudwatch',
+        })
+        latest = points[-1][1]
+        if metric_name == 'BucketSizeBytes':
+            bucket['SizeBytes'] += latest
+            bucket['StorageTypes'][storage_type] = latest
+            span_days = (points[-1][0] - points[0][0]).total_seconds() / 86400
+            if span_days > 0:
+                bucket['GrowthBytesPerDay'] += (latest - points[0][1]) / span_days
+        elif storage_type == 'AllStorageTypes':
+            bucket['Objects'] = int(latest)
+    return usage
+
+def scan_bucket_usage(bucket_name):
+    """Object-level usage from a full listing, for buckets CloudWatch can't answer for."""
+    size = 0
+    objects = 0
+    for obj in iter_bucket_objects(bucket_name):
+        size += obj['Size']
+        objects += 1
+    return {
+        'BucketName': bucket_name,
+        'SizeBytes': float(size),
+        'Objects': objects,
+        'GrowthBytesPerDay': None,
+        'StorageTypes': {},
+        'Source': 'listing',
+    }
+
+def show_usage_analytics(detail_buckets=(), days=S3_METRIC_DAYS):
+    """
+    Shows per-bucket size, object count and growth from S3's free daily
+    CloudWatch metrics, read in each bucket's own region. Buckets without any
+    metrics yet (new buckets) and buckets in detail_buckets fall back to a listing scan.
+    """
+    try:
+        listed = s3.list_buckets()['Buckets']
+        buckets = [bucket['Name'] for bucket in listed]
+        usage = summarize_bucket_storage(fetch_bucket_storage_metrics(listed, days))
+    except Exception as e:
+        logger.error(f"Error fetching S3 storage metrics: {e}")
+        return []
+
+    rows = []
+    for bucket_name in buckets:
+        if bucket_name in usage and bucket_name not in detail_buckets:
+            rows.append(usage[bucket_name])
+            continue
+        try:
+            rows.append(scan_bucket_usage(bucket_name))
+        except Exception as e:
+            logger.error(f"Error calculating usage for bucket '{bucket_name}': {e}")
+
+    print(f"\n--- Bucket Usage ({days}-day trend) ---")
+    for row in rows:
+        objects = row['Objects'] if row['Objects'] is not None else 'N/A'
+        growth = (f"{row['GrowthBytesPerDay'] / 1024 / 1024:+.2f} MB/day"
+                  if row['GrowthBytesPerDay'] is not None else 'N/A')
+        print(f"Bucket '{row['BucketName']}': {row['SizeBytes'] / 1024 / 1024:.2f} MB, "
+              f"{objects} objects, growth {growth} (from {row['Source']})")
+        for storage_type, size in sorted(row['StorageTypes'].items()):
+            print(f"    {storage_type}: {size / 1024 / 1024:.2f} MB")
+    print(f"Total: {sum(row['SizeBytes'] for row in rows) / 1024 / 1024:.2f} MB across {len(rows)} buckets\n")
+    return rows
@@ -1,7 +1,13 @@
 import boto3
 import logging
 import colorlog
+import os
+import sqlite3
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from transfer import upload_file, download_file, compute_etag, candidate_part_sizes, MAX_POOL_CONNECTIONS
 
 # Set up color logging
 handler = colorlog.StreamHandler()
@@ -23,6 +29,9 @@ logger.setLevel(logging.INFO)
 # Initialize AWS services
 s3 = boto3.client('s3')
 
+SYNC_HASH_CACHE = os.path.join(os.path.expanduser('~'), '.s3-sync-hashes.db')
+SYNC_MAX_WORKERS = 16
+
 
 
 def list_buckets():
@@ -40,25 +49,41 @@ def list_buckets():
 
 def create_bucket():
     bucket_name = input("Enter the bucket name: ")
+    region = input(f"Enter the region (default: {s3.meta.region_name}): ").strip() or s3.meta.region_name
     try:
-        response = s3.create_bucket(
-            Bucket=bucket_name,
-            CreateBucketConfiguration={
-                'LocationConstraint': 'ap-south-1'
-            }
-        )
-        logger.info(f"Bucket '{bucket_name}' created successfully.")
+        # us-east-1 is the default location and rejects an explicit LocationConstraint
+        if region == 'us-east-1':
+            boto3.client('s3', region_name=region).create_bucket(Bucket=bucket_name)
+        else:
+            boto3.client('s3', region_name=region).create_bucket(
+                Bucket=bucket_name,
+                CreateBucketConfiguration={
+                    'LocationConstraint': region
+                }
+            )
+        logger.info(f"Bucket '{bucket_name}' created successfully in '{region}'.")
     except Exception as e:
         logger.error(f"Error creating bucket '{bucket_name}': {e}")
 
+def iter_bucket_objects(bucket_name, prefix=''):
+    """
+    Streams every object under the prefix, one page of 1,000 keys at a time, in
+    the lexicographic key order S3 lists them in.
+    """
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        yield from page.get('Contents', [])
+
 def list_bucket_objects():
     bucket_name = input("Enter the bucket name to list objects: ")
     try:
-        response = s3.list_objects_v2(Bucket=bucket_name)
-        if 'Contents' in response:
-            print(f"\n--- Objects in Bucket '{bucket_name}' ---")
-            for obj in response['Contents']:
-                print(f"Object: {obj['Key']} (Size: {obj['Size']} bytes)")
+        found = False
+        for obj in iter_bucket_objects(bucket_name):
+            if not found:
+                print(f"\n--- Objects in Bucket '{bucket_name}' ---")
+                found = True
+            print(f"Object: {obj['Key']} (Size: {obj['Size']} bytes)")
+        if found:
             print()
         else:
             print(f"No objects found in bucket '{bucket_name}'.\n")
@@ -69,8 +94,230 @@ def show_usage():
     buckets = list_buckets()
     for bucket in buckets:
         try:
-            response = s3.list_objects_v2(Bucket=bucket)
-            total_size = sum(obj['Size'] for obj in response.get('Contents', []))
+            total_size = sum(obj['Size'] for obj in iter_bucket_objects(bucket))
             print(f"Bucket '{bucket}' total usage: {total_size / 1024 / 1024:.2f} MB\n")
         except Exception as e:
             logger.error(f"Error calculating usage for bucket '{bucket}': {e}")
+
+def _scan_local_tree(local_dir):
+    """Returns (key relative to local_dir, path, stat) for every file, sorted by key like an S3 listing."""
+    entries = []
+    stack = [local_dir]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    relative_key = os.path.relpath(entry.path, local_dir).replace(os.sep, '/')
+                    entries.append((relative_key, entry.path, entry.stat()))
+    entries.sort(key=lambda entry: entry[0])
+    return entries
+
+def _iter_remote_tree(bucket_name, prefix):
+    """Yields (key relative to prefix, object) from the streamed listing, skipping folder markers."""
+    for obj in iter_bucket_objects(bucket_name, prefix):
+        if not obj['Key'].endswith('/'):
+            yield obj['Key'][len(prefix):], obj
+
+def _merge_trees(local_entries, remote_objects):
+    """Merge-joins the sorted local scan with the sorted listing, yielding (key, local entry, object)."""
+    local_iter = iter(local_entries)
+    local = next(local_iter, None)
+    remote = next(remote_objects, None)
+    while local or remote:
+        if remote is None or (local and local[0] < remote[0]):
+            yield local[0], local, None
+            local = next(local_iter, None)
+        elif local is None or remote[0] < local[0]:
+            yield remote[0], None, remote[1]
+            remote = next(remote_objects, None)
+        else:
+            yield local[0], local, remote[1]
+            local = next(local_iter, None)
+            remote = next(remote_objects, None)
+
+def _open_hash_cache(cache_path, local_dir):
+    """Opens the local hash cache and loads the entries under local_dir into memory."""
+    conn = sqlite3.connect(cache_path, check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS hashes ("
+        "path TEXT, part_size INTEGER, size INTEGER, mtime_ns INTEGER, etag TEXT, "
+        "PRIMARY KEY (path, part_size))"
+    )
+    root = os.path.join(os.path.abspath(local_dir), '')
+    rows = conn.execute(
+        "SELECT path, part_size, size, mtime_ns, etag FROM hashes WHERE path >= ? AND path < ?",
+        (root, root[:-1] + chr(ord(root[-1]) + 1))
+    )
+    cache = {(path, part_size): (size, mtime_ns, etag) for path, part_size, size, mtime_ns, etag in rows}
+    return conn, cache
+
+def _etag_part_sizes(st, remote_etag):
+    """Part sizes to hash the local file with; 0 means a plain single-part MD5."""
+    if '-' not in remote_etag:
+        return [0]
+    return list(candidate_part_sizes(st.st_size, int(remote_etag.rsplit('-', 1)[1])))
+
+def _cached_etags(cache, path, st, part_sizes):
+    """Returns the cached ETags for every part size, or None if any is missing or stale."""
+    etags = []
+    for part_size in part_sizes:
+        cached = cache.get((path, part_size))
+        if not cached or cached[0] != st.st_size or cached[1] != st.st_mtime_ns:
+            return None
+        etags.append(cached[2])
+    return etags
+
+def _hash_local_file(path, st, part_sizes):
+    """Hashes the file once per candidate part size, returning the new cache entries."""
+    return {
+        (path, part_size): (st.st_size, st.st_mtime_ns, compute_etag(path, part_size or None))
+        for part_size in part_sizes
+    }
+
+def _classify(local, obj, etags, direction):
+    """Decides whether an existing pair differs, falling back on mtime if the ETag can't be reproduced."""
+    remote_etag = obj['ETag'].strip('"')
+    if remote_etag in etags:
+        return None
+    if '-' not in remote_etag:
+        return 'changed'
+    local_mtime = local[2].st_mtime
+    remote_mtime = obj['LastModified'].timestamp()
+    newer = local_mtime > remote_mtime if direction == 'upload' else remote_mtime > local_mtime
+    return 'changed' if newer else None
+
+def _local_path(local_dir, key):
+    """Where a key lands under local_dir, or None for keys that would escape it."""
+    if '..' in key.split('/'):
+        return None
+    path = os.path.realpath(os.path.join(local_dir, *key.split('/')))
+    return path if path.startswith(os.path.realpath(local_dir) + os.sep) else None
+
+def diff_directory_with_bucket(local_dir, bucket_name, prefix='', direction='upload',
+                               max_workers=SYNC_MAX_WORKERS, cache_path=SYNC_HASH_CACHE):
+    """
+    Compares a local directory tree with a bucket prefix and returns the files
+    that need transferring in the given direction ('upload' or 'download').
+    Sizes are compared first; same-size files are compared by ETag, with local
+    hashes cached by (path, mtime, size) so unchanged files are never re-hashed.
+    """
+    if prefix and not prefix.endswith('/'):
+        prefix += '/'
+    local_dir = os.path.abspath(local_dir)
+    local_entries = _scan_local_tree(local_dir) if os.path.isdir(local_dir) else []
+    conn, cache = _open_hash_cache(cache_path, local_dir)
+    new_hashes = {}
+    changes = []
+
+    def add_change(key, local, obj, action):
+        path = local[1] if local else _local_path(local_dir, key)
+        if path is None:
+            logger.warning(f"Skipping 's3://{bucket_name}/{prefix}{key}': the key has '..' segments or resolves outside '{local_dir}'.")
+            return
+        changes.append({
+            'Key': prefix + key,
+            'Path': path,
+            'Size': local[2].st_size if direction == 'upload' else obj['Size'],
+            'Action': action,
+        })
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            for key, local, obj in _merge_trees(local_entries, _iter_remote_tree(bucket_name, prefix)):
+                if obj is None:
+                    if direction == 'upload':
+                        add_change(key, local, obj, 'new')
+                elif local is None:
+                    if direction == 'download':
+                        add_change(key, local, obj, 'new')
+                elif local[2].st_size != obj['Size']:
+                    add_change(key, local, obj, 'changed')
+                else:
+                    part_sizes = _etag_part_sizes(local[2], obj['ETag'].strip('"'))
+                    etags = _cached_etags(cache, local[1], local[2], part_sizes)
+                    if etags is None:
+                        future = executor.submit(_hash_local_file, local[1], local[2], part_sizes)
+                        pending[future] = (key, local, obj)
+                        continue
+                    action = _classify(local, obj, etags, direction)
+                    if action:
+                        add_change(key, local, obj, action)
+
+            for future in as_completed(pending):
+                key, local, obj = pending[future]
+                hashes = future.result()
+                new_hashes.update(hashes)
+                action = _classify(local, obj, [etag for _, _, etag in hashes.values()], direction)
+                if action:
+                    add_change(key, local, obj, action)
+    finally:
+        if new_hashes:
+            conn.executemany(
+                "INSERT OR REPLACE INTO hashes (path, part_size, size, mtime_ns, etag) VALUES (?, ?, ?, ?, ?)",
+                [(path, part_size, *entry) for (path, part_size), entry in new_hashes.items()]
+            )
+            conn.commit()
+        conn.close()
+
+    logger.info(f"Compared {len(local_entries)} local files with 's3://{bucket_name}/{prefix}': "
+                f"{len(changes)} to {direction}, {len(new_hashes)} hashes computed.")
+    return changes
+
+def sync_directory(local_dir, bucket_name, prefix='', direction='upload', dry_run=False,
+                   max_workers=SYNC_MAX_WORKERS, cache_path=SYNC_HASH_CACHE):
+    """
+    Syncs a local directory and a bucket prefix in one direction, transferring
+    only new or changed files on a worker pool. Returns the list of changes.
+    """
+    if prefix and not prefix.endswith('/'):
+        prefix += '/'
+    try:
+        changes = diff_directory_with_bucket(local_dir, bucket_name, prefix, direction, max_workers, cache_path)
+    except Exception as e:
+        logger.error(f"Error comparing '{local_dir}' with bucket '{bucket_name}': {e}")
+        return []
+
+    if dry_run:
+        print(f"\n--- Sync Plan ({direction}) ---")
+        for change in changes:
+            print(f"{change['Action']}: {change['Key']} ({change['Size']} bytes)")
+        print(f"Total: {len(changes)} files, {sum(c['Size'] for c in changes) / 1024 / 1024:.2f} MB\n")
+        return changes
+
+    lock = threading.Lock()
+    failed = []
+    # Files and their parts share the transfer client's connection pool
+    part_workers = max(1, MAX_POOL_CONNECTIONS // max_workers)
+
+    def transfer(change):
+        if direction == 'upload':
+            ok = upload_file(change['Path'], bucket_name, change['Key'], max_workers=part_workers)
+        else:
+            os.makedirs(os.path.dirname(change['Path']), exist_ok=True)
+            ok = download_file(bucket_name, change['Key'], change['Path'], max_workers=part_workers)
+        if not ok:
+            with lock:
+                failed.append(change['Key'])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(transfer, changes))
+
+    logger.info(f"Synced {len(changes) - len(failed)} of {len(changes)} files "
+                f"between '{local_dir}' and 's3://{bucket_name}/{prefix}'.")
+    if failed:
+        logger.error(f"Failed to sync {len(failed)} files: {', '.join(failed[:10])}")
+    return changes
+
+def sync_menu():
+    local_dir = input("Enter the local directory: ").strip()
+    bucket_name = input("Enter the bucket name: ").strip()
+    prefix = input("Enter the bucket prefix (optional): ").strip()
+    direction = input("Sync direction (upload/download): ").strip().lower()
+    if direction not in ['upload', 'download']:
+        logger.error("Invalid input. Please enter 'upload' or 'download'.")
+        return
+    dry_run = input("Dry run only? (y/n): ").strip().lower() == 'y'
+    sync_directory(local_dir, bucket_name, prefix, direction, dry_run)
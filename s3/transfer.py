@@ -0,0 +1,396 @@
+import boto3
+import base64
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import threading
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+DEFAULT_PART_SIZE = 64 * MB
+DEFAULT_MAX_WORKERS = 8
+MIN_PART_SIZE = 5 * MB  # S3 minimum for every part but the last
+MAX_PARTS = 10000
+STREAM_CHUNK_SIZE = 1 * MB
+JOURNAL_DIR = os.path.join(os.path.expanduser('~'), '.s3-transfer-journal')
+
+MAX_POOL_CONNECTIONS = 64
+
+# Initialize AWS services with enough connections for the part workers
+s3 = boto3.client('s3', config=Config(max_pool_connections=MAX_POOL_CONNECTIONS))
+
+
+class _PartReader:
+    """
+    File-like view over a slice of an mmap. Each read() copies only the chunk
+    the HTTP layer asks for, so a part is never held in memory as a whole.
+    """
+
+    def __init__(self, view):
+        self._view = view
+        self._pos = 0
+
+    def __len__(self):
+        return len(self._view)
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        data = self._view[self._pos:end].tobytes()
+        self._pos = end
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, min(offset, len(self._view)))
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+def adjust_part_size(file_size, part_size):
+    """Raises part_size to the S3 minimum, and as far as needed to stay within 10,000 parts."""
+    part_size = max(part_size, MIN_PART_SIZE)
+    if math.ceil(file_size / part_size) > MAX_PARTS:
+        part_size = math.ceil(file_size / MAX_PARTS / MB) * MB
+    return part_size
+
+
+def _part_ranges(file_size, part_size):
+    """Yields (part number, offset, length) for each part of a file."""
+    for number, offset in enumerate(range(0, file_size, part_size), 1):
+        yield number, offset, min(part_size, file_size - offset)
+
+
+def compute_etag(file_path, part_size=None):
+    """
+    Computes the ETag S3 reports for the file: the plain MD5 for single-part
+    uploads, or the MD5 of the part MD5s suffixed with the part count.
+    """
+    file_size = os.path.getsize(file_path)
+    if file_size == 0:
+        return hashlib.md5().hexdigest()
+
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            if not part_size or file_size <= part_size:
+                return hashlib.md5(view).hexdigest()
+            digests = b''.join(
+                hashlib.md5(view[offset:offset + length]).digest()
+                for _, offset, length in _part_ranges(file_size, part_size)
+            )
+            return f"{hashlib.md5(digests).hexdigest()}-{math.ceil(file_size / part_size)}"
+        finally:
+            view.release()
+
+
+def candidate_part_sizes(file_size, part_count):
+    """Part sizes that split file_size into exactly part_count parts, most likely first."""
+    sizes = [DEFAULT_PART_SIZE, math.ceil(file_size / part_count / MB) * MB]
+    sizes += [n * MB for n in (5, 8, 16, 32, 100, 128, 256, 512)]
+    seen = set()
+    for size in sizes:
+        if size not in seen and math.ceil(file_size / size) == part_count:
+            seen.add(size)
+            yield size
+
+
+def etag_matches(file_path, etag, part_size=None):
+    """
+    Checks a local file against an S3 ETag. For a multipart ETag, pass the
+    object's real part size to get a definite answer; without it the likely
+    part sizes are tried and None means none of them reproduced the ETag.
+    """
+    etag = etag.strip('"')
+    if '-' not in etag:
+        return compute_etag(file_path) == etag
+    if part_size:
+        return compute_etag(file_path, part_size) == etag
+    part_count = int(etag.rsplit('-', 1)[1])
+    for part_size in candidate_part_sizes(os.path.getsize(file_path), part_count):
+        if compute_etag(file_path, part_size) == etag:
+            return True
+    return None
+
+
+def _journal_path(journal_dir, direction, bucket_name, key, file_path):
+    digest = hashlib.sha1(f"{direction}:{bucket_name}:{key}:{os.path.abspath(file_path)}".encode()).hexdigest()
+    return os.path.join(journal_dir, f"{direction}-{digest}.json")
+
+
+def _load_journal(journal_path):
+    try:
+        with open(journal_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_journal(journal_path, journal):
+    """Writes the journal atomically so an interruption never leaves it half-written."""
+    os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+    tmp_path = f"{journal_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(journal, f)
+    os.replace(tmp_path, journal_path)
+
+
+def _remove_journal(journal_path):
+    try:
+        os.remove(journal_path)
+    except FileNotFoundError:
+        pass
+
+
+def _server_parts(bucket_name, key, upload_id):
+    """Returns {part number: ETag} for the parts S3 already holds, or None if the upload is gone."""
+    parts = {}
+    try:
+        for page in s3.get_paginator('list_parts').paginate(Bucket=bucket_name, Key=key, UploadId=upload_id):
+            for part in page.get('Parts', []):
+                parts[str(part['PartNumber'])] = part['ETag']
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'NoSuchUpload':
+            return None
+        raise
+    return parts
+
+
+def _resume_or_start_upload(journal_path, file_path, bucket_name, key, part_size):
+    stat = os.stat(file_path)
+    journal = _load_journal(journal_path)
+
+    if journal:
+        unchanged = (journal['size'] == stat.st_size and journal['mtime'] == stat.st_mtime
+                     and journal['part_size'] == part_size)
+        parts = _server_parts(bucket_name, key, journal['upload_id']) if unchanged else None
+        if parts is not None:
+            journal['parts'] = parts
+            logger.info(f"Resuming upload of '{file_path}': {len(parts)} parts already in S3.")
+            return journal
+        if not unchanged:
+            logger.warning(f"'{file_path}' changed since the interrupted upload. Starting over.")
+            try:
+                s3.abort_multipart_upload(Bucket=bucket_name, Key=key, UploadId=journal['upload_id'])
+            except ClientError:
+                pass
+
+    response = s3.create_multipart_upload(Bucket=bucket_name, Key=key)
+    journal = {
+        'bucket': bucket_name,
+        'key': key,
+        'file': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'part_size': part_size,
+        'upload_id': response['UploadId'],
+        'parts': {},
+    }
+    _save_journal(journal_path, journal)
+    return journal
+
+
+def _etag_is_md5(response):
+    """SSE-KMS and SSE-C objects get ETags that are not the MD5 of their content."""
+    return not (response.get('ServerSideEncryption', '').startswith('aws:kms') or response.get('SSECustomerAlgorithm'))
+
+
+def _upload_part(view, bucket_name, key, upload_id, number, offset, length):
+    # Release the slice on the way out so the mmap can be closed even after a failure
+    with view[offset:offset + length] as part:
+        md5 = hashlib.md5(part).digest()
+        response = s3.upload_part(
+            Bucket=bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=number,
+            Body=_PartReader(part),
+            ContentLength=length,
+            ContentMD5=base64.b64encode(md5).decode(),
+        )
+    # S3 rejects the part if the body does not match ContentMD5; where the ETag is an MD5 it guards the response too
+    if _etag_is_md5(response) and response['ETag'].strip('"') != md5.hex():
+        raise ValueError(f"ETag mismatch for part {number} of '{key}'")
+    return number, response['ETag']
+
+
+def upload_file(file_path, bucket_name, key=None, part_size=DEFAULT_PART_SIZE,
+                max_workers=DEFAULT_MAX_WORKERS, journal_dir=JOURNAL_DIR):
+    """
+    Uploads a file, using parallel multipart uploads for files larger than
+    part_size. Completed parts are journaled so an interrupted upload resumes
+    where it stopped on the next call with the same arguments.
+    """
+    key = key or os.path.basename(file_path)
+    try:
+        file_size = os.path.getsize(file_path)
+        if file_size <= part_size:
+            with open(file_path, 'rb') as f:
+                body = f.read()
+            s3.put_object(Bucket=bucket_name, Key=key, Body=body,
+                          ContentMD5=base64.b64encode(hashlib.md5(body).digest()).decode())
+            logger.info(f"Uploaded '{file_path}' to 's3://{bucket_name}/{key}' ({file_size} bytes).")
+            return True
+
+        part_size = adjust_part_size(file_size, part_size)
+        journal_path = _journal_path(journal_dir, 'upload', bucket_name, key, file_path)
+        journal = _resume_or_start_upload(journal_path, file_path, bucket_name, key, part_size)
+        upload_id = journal['upload_id']
+        lock = threading.Lock()
+
+        pending = [r for r in _part_ranges(file_size, part_size) if str(r[0]) not in journal['parts']]
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [
+                        executor.submit(_upload_part, view, bucket_name, key, upload_id, number, offset, length)
+                        for number, offset, length in pending
+                    ]
+                    try:
+                        for future in as_completed(futures):
+                            number, etag = future.result()
+                            with lock:
+                                journal['parts'][str(number)] = etag
+                                _save_journal(journal_path, journal)
+                    except BaseException:
+                        for future in futures:
+                            future.cancel()
+                        raise
+            finally:
+                view.release()
+
+        parts = sorted(journal['parts'].items(), key=lambda item: int(item[0]))
+        s3.complete_multipart_upload(
+            Bucket=bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': [{'PartNumber': int(n), 'ETag': etag} for n, etag in parts]},
+        )
+
+        head = s3.head_object(Bucket=bucket_name, Key=key)
+        # Every part was already checked by S3 against its ContentMD5; the composite ETag only
+        # confirms the assembly where the ETags are MD5s
+        expected = hashlib.md5(b''.join(bytes.fromhex(etag.strip('"')) for _, etag in parts)).hexdigest()
+        actual = head['ETag'].strip('"')
+        if _etag_is_md5(head) and actual != f"{expected}-{len(parts)}":
+            logger.error(f"Checksum mismatch after uploading '{file_path}': expected {expected}-{len(parts)}, got {actual}.")
+            return False
+
+        _remove_journal(journal_path)
+        logger.info(f"Uploaded '{file_path}' to 's3://{bucket_name}/{key}' in {len(parts)} parts ({file_size} bytes).")
+        return True
+    except Exception as e:
+        logger.error(f"Error uploading '{file_path}' to 's3://{bucket_name}/{key}': {e}")
+        return False
+
+
+def _download_part(fd, bucket_name, key, etag, offset, length):
+    response = s3.get_object(Bucket=bucket_name, Key=key, IfMatch=etag,
+                             Range=f"bytes={offset}-{offset + length - 1}")
+    written = 0
+    for chunk in response['Body'].iter_chunks(STREAM_CHUNK_SIZE):
+        os.pwrite(fd, chunk, offset + written)
+        written += len(chunk)
+    if written != length:
+        raise ValueError(f"Short read at offset {offset} of '{key}': {written} of {length} bytes")
+
+
+def download_file(bucket_name, key, file_path=None, part_size=DEFAULT_PART_SIZE,
+                  max_workers=DEFAULT_MAX_WORKERS, journal_dir=JOURNAL_DIR):
+    """
+    Downloads an object with parallel ranged GETs written straight into place.
+    Progress is journaled against the object's ETag, so an interrupted download
+    resumes as long as the object has not changed.
+    """
+    file_path = file_path or os.path.basename(key)
+    tmp_path = f"{file_path}.part"
+    try:
+        head = s3.head_object(Bucket=bucket_name, Key=key)
+        file_size = head['ContentLength']
+        etag = head['ETag']
+
+        journal_path = _journal_path(journal_dir, 'download', bucket_name, key, file_path)
+        journal = _load_journal(journal_path)
+        if not journal or journal['etag'] != etag or journal['part_size'] != part_size or not os.path.exists(tmp_path):
+            journal = {'bucket': bucket_name, 'key': key, 'etag': etag, 'size': file_size,
+                       'part_size': part_size, 'parts': []}
+            with open(tmp_path, 'wb') as f:
+                f.truncate(file_size)
+            _save_journal(journal_path, journal)
+        else:
+            logger.info(f"Resuming download of '{key}': {len(journal['parts'])} parts already on disk.")
+
+        done = set(journal['parts'])
+        lock = threading.Lock()
+        fd = os.open(tmp_path, os.O_RDWR)
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(_download_part, fd, bucket_name, key, etag, offset, length): number
+                    for number, offset, length in _part_ranges(file_size, part_size)
+                    if number not in done
+                }
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                        with lock:
+                            journal['parts'].append(futures[future])
+                            _save_journal(journal_path, journal)
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        # SSE-KMS/SSE-C ETags are not MD5s; otherwise the check is definite, multipart included
+        verified = None
+        if _etag_is_md5(head):
+            uploaded_part_size = None
+            if '-' in etag:
+                uploaded_part_size = s3.head_object(Bucket=bucket_name, Key=key, PartNumber=1)['ContentLength']
+            verified = etag_matches(tmp_path, etag, uploaded_part_size)
+        if verified is False:
+            logger.error(f"Checksum mismatch downloading 's3://{bucket_name}/{key}'. Discarding '{tmp_path}'.")
+            os.remove(tmp_path)
+            _remove_journal(journal_path)
+            return False
+
+        os.replace(tmp_path, file_path)
+        _remove_journal(journal_path)
+        logger.info(f"Downloaded 's3://{bucket_name}/{key}' to '{file_path}' ({file_size} bytes).")
+        return True
+    except Exception as e:
+        logger.error(f"Error downloading 's3://{bucket_name}/{key}': {e}")
+        return False
+
+
+def upload_file_menu():
+    file_path = input("Enter the local file path: ").strip()
+    bucket_name = input("Enter the bucket name: ").strip()
+    key = input(f"Enter the object key (default: {os.path.basename(file_path)}): ").strip() or None
+    part_size = int(input(f"Enter the part size in MB (default: {DEFAULT_PART_SIZE // MB}): ").strip() or DEFAULT_PART_SIZE // MB)
+    max_workers = int(input(f"Enter the number of parallel parts (default: {DEFAULT_MAX_WORKERS}): ").strip() or DEFAULT_MAX_WORKERS)
+    upload_file(file_path, bucket_name, key, part_size * MB, max_workers)
+
+
+def download_file_menu():
+    bucket_name = input("Enter the bucket name: ").strip()
+    key = input("Enter the object key: ").strip()
+    file_path = input(f"Enter the local file path (default: {os.path.basename(key)}): ").strip() or None
+    part_size = int(input(f"Enter the part size in MB (default: {DEFAULT_PART_SIZE // MB}): ").strip() or DEFAULT_PART_SIZE // MB)
+    max_workers = int(input(f"Enter the number of parallel parts (default: {DEFAULT_MAX_WORKERS}): ").strip() or DEFAULT_MAX_WORKERS)
+    download_file(bucket_name, key, file_path, part_size * MB, max_workers)
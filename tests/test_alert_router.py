@@ -0,0 +1,127 @@
+import json
+import os
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from alert_router.router import AlertRouter, setup_alert_queue
+
+
+def _alarm(name, instance_id, state='ALARM', changed='2024-01-01T00:00:00.000+0000'):
+    return json.dumps({
+        'AlarmName': name,
+        'NewStateValue': state,
+        'NewStateReason': 'Threshold Crossed',
+        'StateChangeTime': changed,
+        'Region': 'US East (N. Virginia)',
+        'Trigger': {
+            'Namespace': 'AWS/EC2',
+            'MetricName': 'CPUUtilization',
+            'Dimensions': [{'name': 'InstanceId', 'value': instance_id}],
+        },
+    })
+
+
+class CapturingSink:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.notifications = []
+
+    def __call__(self, notification):
+        if self.fail:
+            raise RuntimeError("sink unavailable")
+        self.notifications.append(notification)
+
+
+@pytest.fixture
+def aws():
+    with mock_aws():
+        sns = boto3.client('sns')
+        sqs = boto3.client('sqs')
+        topic_arn = sns.create_topic(Name='HighCPUUtilizationAlerts')['TopicArn']
+        queue_url = setup_alert_queue('alert-router-test', [topic_arn], sqs=sqs, sns=sns)
+        yield sns, sqs, topic_arn, queue_url
+
+
+def _receive_all(router):
+    """Drains the queue through the router the way a worker does. Returns every receipt handle seen."""
+    receipts = []
+    while True:
+        messages = router.sqs.receive_message(QueueUrl=router.queue_url, MaxNumberOfMessages=10,
+                                              WaitTimeSeconds=0).get('Messages', [])
+        if not messages:
+            return receipts
+        receipts.extend(m['ReceiptHandle'] for m in messages)
+        deletable = router.handle_messages(messages)
+        if deletable:
+            router._delete(deletable)
+
+
+def _queued(sqs, queue_url):
+    attributes = sqs.get_queue_attributes(
+        QueueUrl=queue_url, AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible'])
+    return sum(int(v) for v in attributes['Attributes'].values())
+
+
+def test_groups_alarms_and_drops_duplicates(aws):
+    sns, sqs, topic_arn, queue_url = aws
+    sns.publish(TopicArn=topic_arn, Message=_alarm('HighCPUUtilization-i-1', 'i-1'))
+    sns.publish(TopicArn=topic_arn, Message=_alarm('HighCPUUtilization-i-2', 'i-2'))
+    # SNS redelivery of the same state change under a new message ID
+    sns.publish(TopicArn=topic_arn, Message=_alarm('HighCPUUtilization-i-1', 'i-1'))
+    sns.publish(TopicArn=topic_arn, Message='not an alarm')
+
+    sink = CapturingSink()
+    router = AlertRouter(queue_url, [sink], group_window=0, wait_seconds=0, sqs=sqs)
+    _receive_all(router)
+    router.flush(force=True)
+
+    assert len(sink.notifications) == 1
+    notification = sink.notifications[0]
+    assert notification['Count'] == 2
+    assert notification['Resources'] == ['i-1', 'i-2']
+    assert router.stats == {'received': 4, 'duplicates': 1, 'ignored': 1, 'notifications': 1}
+    assert _queued(sqs, queue_url) == 0
+
+
+def test_failed_sink_keeps_duplicates_for_redelivery(aws):
+    sns, sqs, topic_arn, queue_url = aws
+    sns.publish(TopicArn=topic_arn, Message=_alarm('HighCPUUtilization-i-1', 'i-1'))
+    sns.publish(TopicArn=topic_arn, Message=_alarm('HighCPUUtilization-i-1', 'i-1'))
+
+    router = AlertRouter(queue_url, [CapturingSink(fail=True)], group_window=0, wait_seconds=0, sqs=sqs)
+    receipts = _receive_all(router)
+    router.flush(force=True)
+    # Neither the original nor its duplicate may be deleted while the alarm was never delivered
+    assert _queued(sqs, queue_url) == 2
+
+    for handle in receipts:  # as if the visibility timeout expired
+        sqs.change_message_visibility(QueueUrl=queue_url, ReceiptHandle=handle, VisibilityTimeout=0)
+    sink = CapturingSink()
+    router.sinks = [sink]
+    _receive_all(router)
+    router.flush(force=True)
+    assert [n['Count'] for n in sink.notifications] == [1]
+    assert _queued(sqs, queue_url) == 0
+
+
+def test_duplicate_after_delivery_is_deleted(aws):
+    sns, sqs, topic_arn, queue_url = aws
+    sink = CapturingSink()
+    router = AlertRouter(queue_url, [sink], group_window=0, wait_seconds=0, sqs=sqs)
+
+    sns.publish(TopicArn=topic_arn, Message=_alarm('HighCPUUtilization-i-1', 'i-1'))
+    _receive_all(router)
+    router.flush(force=True)
+    sns.publish(TopicArn=topic_arn, Message=_alarm('HighCPUUtilization-i-1', 'i-1'))
+    _receive_all(router)
+    router.flush(force=True)
+
+    assert len(sink.notifications) == 1
+    assert router.stats['duplicates'] == 1
+    assert _queued(sqs, queue_url) == 0
@@ -0,0 +1,89 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 's3')))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from analyzer import AGE_BUCKETS_DAYS, HISTOGRAM_SUBBUCKETS, SizeHistogram, SpaceSaving, _age_label, _age_lower_bound
+
+
+def _stream(seed=0, items=5000, length=50000):
+    rng = random.Random(seed)
+    # Zipf-like weights so a few items are genuinely heavy
+    return [(f"item-{int(rng.paretovariate(1.2)) % items}", rng.randint(1, 100)) for _ in range(length)]
+
+
+def test_space_saving_exact_when_under_capacity():
+    sketch = SpaceSaving(k=10)
+    for item, weight in [('a', 5), ('b', 3), ('a', 2), ('c', 1)]:
+        sketch.add(item, weight)
+    assert sketch.top(3) == [
+        {'Item': 'a', 'Weight': 7, 'MaxError': 0},
+        {'Item': 'b', 'Weight': 3, 'MaxError': 0},
+        {'Item': 'c', 'Weight': 1, 'MaxError': 0},
+    ]
+
+
+def test_space_saving_error_bounds():
+    stream = _stream()
+    k = 100
+    sketch = SpaceSaving(k)
+    truth = {}
+    for item, weight in stream:
+        sketch.add(item, weight)
+        truth[item] = truth.get(item, 0) + weight
+    total = sum(truth.values())
+
+    assert len(sketch.counters) == k
+    for item, (weight, error) in sketch.counters.items():
+        # Never underestimates, and overestimates by at most the recorded error
+        assert truth[item] <= weight <= truth[item] + error
+        assert error <= total / k
+    # Every item heavier than total/k is guaranteed to be tracked
+    for item, weight in truth.items():
+        if weight > total / k:
+            assert item in sketch.counters
+
+
+def test_space_saving_top_is_sorted():
+    sketch = SpaceSaving(50)
+    for item, weight in _stream(seed=1):
+        sketch.add(item, weight)
+    weights = [row['Weight'] for row in sketch.top(50)]
+    assert weights == sorted(weights, reverse=True)
+
+
+def test_size_histogram_counts():
+    sizes = [0, 0, 1, 2, 3, 1024, 1500, 2048, 10 ** 6]
+    histogram = SizeHistogram()
+    for size in sizes:
+        histogram.add(size)
+    assert histogram.total == len(sizes)
+    assert sum(histogram.counts.values()) == len(sizes)
+    assert sum(histogram.bytes.values()) == sum(sizes)
+
+    octaves = histogram.octaves()
+    assert [row['MinBytes'] for row in octaves] == sorted(row['MinBytes'] for row in octaves)
+    assert sum(row['Objects'] for row in octaves) == len(sizes)
+    assert sum(row['Bytes'] for row in octaves) == sum(sizes)
+    assert octaves[0] == {'MinBytes': 0, 'Objects': 2, 'Bytes': 0}
+
+
+def test_size_histogram_quantile_error_bound():
+    rng = random.Random(2)
+    sizes = sorted(int(rng.lognormvariate(10, 3)) + 1 for _ in range(20000))
+    histogram = SizeHistogram()
+    for size in sizes:
+        histogram.add(size)
+    for q in (0.5, 0.9, 0.99):
+        exact = sizes[int(q * len(sizes)) - 1]
+        estimate = histogram.quantile(q)
+        # The estimate is the lower bound of the sub-bucket holding the exact value
+        assert estimate <= exact < (estimate + 1) * 2 ** (1 / HISTOGRAM_SUBBUCKETS)
+
+
+def test_age_labels_sort_numerically():
+    labels = [_age_label(days) for days in (400, 100, 40, 10, 3, 0)]
+    assert sorted(labels, key=_age_lower_bound) == [
+        '<1d', '<7d', '<30d', '<90d', '<365d', f">={AGE_BUCKETS_DAYS[-1]}d"]